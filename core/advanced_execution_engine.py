@@ -4,9 +4,12 @@ Complete order type support and smart execution logic
 """
 import asyncio
 import json
-from datetime import datetime, timedelta
+import re
+import time
+from datetime import datetime
 from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from enum import Enum
 import logging
 
@@ -14,6 +17,59 @@ from .execution_engine import ExecutionEngine, TradingOrder, OrderType, OrderSta
 
 logger = logging.getLogger(__name__)
 
+# Signal-text patterns, compiled once at import (text is upper-cased before matching)
+_LOT_PATTERNS = tuple(re.compile(p) for p in (
+    r'LOT[S]?\s*[:\-]?\s*(\d+\.?\d*)',
+    r'(\d+\.?\d*)\s*LOT[S]?',
+    r'SIZE\s*[:\-]?\s*(\d+\.?\d*)'
+))
+_RISK_PATTERNS = tuple(re.compile(p) for p in (
+    r'RISK\s*[:\-]?\s*(\d+\.?\d*)%',
+    r'(\d+\.?\d*)%\s*RISK'
+))
+# (pattern, canonical command) pairs; "{}" takes the captured value
+_COMMAND_PATTERNS = tuple((re.compile(p), command) for p, command in (
+    (r'CLOSE\s+(\d+)%', "CLOSE {}%"),
+    (r'CLOSE\s+ALL', "CLOSE ALL"),
+    (r'CANCEL\s+ALL', "CANCEL ALL"),
+    (r'TP\s+TO\s+(\d+\.?\d*)', "TP TO {}"),
+    (r'SL\s+TO\s+(\d+\.?\d*)', "SL TO {}"),
+    (r'BREAK\s*EVEN', "BREAK EVEN"),
+    (r'MOVE\s+SL\s+TO\s+(\d+\.?\d*)', "MOVE SL TO {}"),
+    (r'TRAILING\s+STOP', "TRAILING STOP")
+))
+# Provider command kinds, matched against the lower-cased command in one scan
+_PROVIDER_COMMAND_RE = re.compile(
+    r'(?P<close_percent>close\s+(?P<percent>\d+(?:\.\d+)?)\s*%)'
+    r'|(?P<close_all>close\s+all)'
+    r'|(?P<tp_to>tp\s+to\s+(?P<tp_price>\d+(?:\.\d+)?))'
+    r'|(?P<sl_to>sl\s+to\s+(?P<sl_price>\d+(?:\.\d+)?))'
+    r'|(?P<break_even>break\s*even|\bbe\b)'
+    r'|(?P<trailing>trailing)'
+    r'|(?P<cancel>cancel)'
+)
+# When a command mentions several kinds, the first of these present wins
+_PROVIDER_COMMAND_PRIORITY = ("close_percent", "close_all", "tp_to", "sl_to", "break_even", "trailing", "cancel")
+
+_TP_KEY_RE = re.compile(r'tp([1-9]\d*)')
+
+# Any command at all; most signals carry none, so one scan settles them
+_ANY_COMMAND_RE = re.compile("|".join(f"(?:{pattern.pattern})" for pattern, _ in _COMMAND_PATTERNS))
+
+@lru_cache(maxsize=None)
+def _pip_params(pair: str) -> Tuple[int, int]:
+    """(price-to-pips scale, pip value for 1 lot) for a pair (simplified)"""
+    if pair.endswith('JPY'):
+        return 100, 1000
+    return 10000, 10
+
+def _risk_lot(entry: float, sl: float, balance: float, risk_percent: float, pair: str) -> float:
+    """Lot size risking risk_percent of balance between entry and sl, clamped to 0.01-100"""
+    pip_scale, pip_value = _pip_params(pair)
+    pip_distance = abs(entry - sl) * pip_scale
+    lot_size = balance * (risk_percent / 100) / (pip_distance * pip_value)
+    return round(max(0.01, min(100.0, lot_size)), 2)
+
 class SmartEntryMode(Enum):
     IMMEDIATE = "IMMEDIATE"
     RANGE_BASED = "RANGE_BASED"
@@ -25,7 +81,7 @@ class OrderExecution(Enum):
     PENDING = "PENDING"
     CONDITIONAL = "CONDITIONAL"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AdvancedOrderConfig:
     smart_entry_mode: SmartEntryMode = SmartEntryMode.IMMEDIATE
     max_entry_deviation_pips: float = 5.0
@@ -36,31 +92,25 @@ class AdvancedOrderConfig:
     retry_failed_orders: bool = True
     max_retry_attempts: int = 3
 
-@dataclass
+# Shared by every order that isn't given its own config; frozen so no order can alter it
+_DEFAULT_ORDER_CONFIG = AdvancedOrderConfig()
+
+@dataclass(slots=True)
 class TakeProfitLevel:
     level: int
     price: float
     lot_percentage: float  # Percentage of total position
     sl_move_on_hit: Optional[float] = None  # Move SL to this price when TP hits
     
-@dataclass
+@dataclass(slots=True)
 class AdvancedTradingOrder(TradingOrder):
-    tp_levels: List[TakeProfitLevel] = None
+    tp_levels: List[TakeProfitLevel] = field(default_factory=list)
     trailing_sl_enabled: bool = False
     trailing_sl_distance_pips: float = 20.0
     break_even_pips: float = 10.0
-    smart_entry_config: AdvancedOrderConfig = None
+    smart_entry_config: AdvancedOrderConfig = _DEFAULT_ORDER_CONFIG
     original_signal_text: str = ""
-    provider_commands: List[str] = None
-    
-    def __post_init__(self):
-        super().__post_init__()
-        if self.tp_levels is None:
-            self.tp_levels = []
-        if self.smart_entry_config is None:
-            self.smart_entry_config = AdvancedOrderConfig()
-        if self.provider_commands is None:
-            self.provider_commands = []
+    provider_commands: List[str] = field(default_factory=list)
 
 class AdvancedExecutionEngine(ExecutionEngine):
     """Advanced execution engine with complete order management"""
@@ -70,6 +120,47 @@ class AdvancedExecutionEngine(ExecutionEngine):
         self.pending_orders: Dict[str, AdvancedTradingOrder] = {}
         self.order_tracking: Dict[int, str] = {}  # MT5 ticket -> order_id mapping
         self.provider_commands_queue: List[Dict[str, Any]] = []
+        self._price_streams: Dict[str, List[asyncio.Queue]] = {}  # pair -> monitor queues
+        self._price_feeds: Dict[str, asyncio.Task] = {}  # pair -> running feed task
+        self._balance_cache: Optional[Tuple[float, float]] = None  # (monotonic fetched at, balance)
+        self._balance_lock = asyncio.Lock()
+    
+    def _subscribe_price(self, pair: str) -> asyncio.Queue:
+        """Subscribe to the shared price feed for a pair, starting it if needed"""
+        queue = asyncio.Queue(maxsize=1)
+        subscribers = self._price_streams.setdefault(pair, [])
+        subscribers.append(queue)
+        feed = self._price_feeds.get(pair)
+        if feed is None or feed.done():
+            # Held here so the loop's weak task reference can't let it be collected
+            self._price_feeds[pair] = asyncio.create_task(self._price_feed(pair))
+        return queue
+    
+    def _unsubscribe_price(self, pair: str, queue: asyncio.Queue):
+        """Drop a monitor's queue; the feed stops once a pair has no subscribers"""
+        subscribers = self._price_streams.get(pair)
+        if subscribers and queue in subscribers:
+            subscribers.remove(queue)
+            if not subscribers:
+                del self._price_streams[pair]
+                feed = self._price_feeds.pop(pair, None)
+                if feed is not None:
+                    feed.cancel()
+    
+    async def _price_feed(self, pair: str):
+        """Poll one pair's price for all its monitors, keeping only the latest tick per queue"""
+        while pair in self._price_streams:
+            try:
+                price = await self.mt5_bridge.get_current_price(pair)
+            except Exception as e:
+                logger.error(f"Error in price feed for {pair}: {e}")
+            else:
+                for queue in self._price_streams.get(pair, ()):
+                    if queue.full():
+                        queue.get_nowait()  # Monitor hasn't caught up, replace stale price
+                    queue.put_nowait(price)
+            
+            await asyncio.sleep(1)
         
     async def process_advanced_signal(self, signal_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process signal with advanced order management"""
@@ -124,15 +215,21 @@ class AdvancedExecutionEngine(ExecutionEngine):
         """Parse up to 100 TP levels from signal"""
         tp_levels = []
         
-        # Check for explicit TP levels (TP1, TP2, etc.)
-        for i in range(1, 101):  # Support up to 100 TP levels
-            tp_key = f"tp{i}"
-            if tp_key in signal_data:
-                tp_levels.append(TakeProfitLevel(
-                    level=i,
-                    price=signal_data[tp_key],
-                    lot_percentage=100.0 / len([k for k in signal_data.keys() if k.startswith('tp')])
-                ))
+        # Check for explicit TP levels (TP1, TP2, etc.), sharing the position equally
+        found = []
+        for key, price in signal_data.items():
+            match = _TP_KEY_RE.fullmatch(key)
+            if match and int(match.group(1)) <= 100:  # Support up to 100 TP levels
+                found.append((int(match.group(1)), price))
+        found.sort()
+        
+        lot_percentage = 100.0 / len(found) if found else 0.0
+        for level, price in found:
+            tp_levels.append(TakeProfitLevel(
+                level=level,
+                price=price,
+                lot_percentage=lot_percentage
+            ))
         
         # If no explicit levels, check for single TP or TP array
         if not tp_levels:
@@ -182,15 +279,8 @@ class AdvancedExecutionEngine(ExecutionEngine):
         raw_text = signal_data.get('raw_text', '').upper()
         
         # Look for lot size in text
-        import re
-        lot_patterns = [
-            r'LOT[S]?\s*[:\-]?\s*(\d+\.?\d*)',
-            r'(\d+\.?\d*)\s*LOT[S]?',
-            r'SIZE\s*[:\-]?\s*(\d+\.?\d*)'
-        ]
-        
-        for pattern in lot_patterns:
-            match = re.search(pattern, raw_text)
+        for pattern in _LOT_PATTERNS:
+            match = pattern.search(raw_text)
             if match:
                 try:
                     return float(match.group(1))
@@ -198,13 +288,8 @@ class AdvancedExecutionEngine(ExecutionEngine):
                     continue
         
         # Extract risk percentage and calculate
-        risk_patterns = [
-            r'RISK\s*[:\-]?\s*(\d+\.?\d*)%',
-            r'(\d+\.?\d*)%\s*RISK'
-        ]
-        
-        for pattern in risk_patterns:
-            match = re.search(pattern, raw_text)
+        for pattern in _RISK_PATTERNS:
+            match = pattern.search(raw_text)
             if match:
                 try:
                     risk_percent = float(match.group(1))
@@ -227,65 +312,41 @@ class AdvancedExecutionEngine(ExecutionEngine):
             # Get account balance
             account_balance = 10000.0  # Default, should get from MT5
             if self.mt5_bridge:
-                account_info = await self.mt5_bridge.get_account_info()
-                account_balance = account_info.get('balance', 10000.0)
-            
-            # Calculate risk amount
-            risk_amount = account_balance * (risk_percent / 100)
-            
-            # Calculate pip distance
-            pip_distance = abs(entry - sl)
-            if pair.endswith('JPY'):
-                pip_distance *= 100
-            else:
-                pip_distance *= 10000
+                account_balance = await self._get_account_balance()
             
-            # Calculate pip value (simplified)
-            if pair.endswith('JPY'):
-                pip_value = 1000  # For 1 lot
-            else:
-                pip_value = 10  # For 1 lot
-            
-            # Calculate lot size
-            lot_size = risk_amount / (pip_distance * pip_value)
-            
-            # Validate and round
-            lot_size = max(0.01, min(100.0, lot_size))
-            return round(lot_size, 2)
+            return _risk_lot(entry, sl, account_balance, risk_percent, pair)
             
         except Exception as e:
             logger.error(f"Error calculating risk-based lot: {e}")
             return 0.01
     
+    async def _get_account_balance(self) -> float:
+        """Account balance from MT5, reused for 2 seconds across signals"""
+        async with self._balance_lock:  # Concurrent signals share one fetch
+            if self._balance_cache is None or time.monotonic() - self._balance_cache[0] >= 2.0:
+                account_info = await self.mt5_bridge.get_account_info()
+                balance = account_info.get('balance', 10000.0)
+                self._balance_cache = (time.monotonic(), balance)
+            return self._balance_cache[1]
+    
     def _extract_provider_commands(self, signal_text: str) -> List[str]:
         """Extract provider commands from signal text"""
         commands = []
         text = signal_text.upper()
+        if not _ANY_COMMAND_RE.search(text):
+            return commands
         
-        # Common command patterns
-        command_patterns = [
-            r'CLOSE\s+(\d+)%',
-            r'CLOSE\s+ALL',
-            r'CANCEL\s+ALL',
-            r'TP\s+TO\s+(\d+\.?\d*)',
-            r'SL\s+TO\s+(\d+\.?\d*)',
-            r'BREAK\s*EVEN',
-            r'MOVE\s+SL\s+TO\s+(\d+\.?\d*)',
-            r'TRAILING\s+STOP'
-        ]
-        
-        for pattern in command_patterns:
-            import re
-            matches = re.findall(pattern, text)
-            if matches:
-                commands.append(pattern.replace(r'\s+', ' ').replace(r'(\d+\.?\d*)', matches[0] if matches[0] else ''))
+        for pattern, command in _COMMAND_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                commands.append(command.format(*match.groups()))
         
         return commands
     
     def _create_advanced_order(self, signal_data: Dict[str, Any]) -> AdvancedTradingOrder:
         """Create advanced trading order from signal data"""
         order = AdvancedTradingOrder(
-            id=f"adv_order_{signal_data['id']}_{datetime.utcnow().timestamp()}",
+            id=f"adv_order_{signal_data['id']}_{time.time_ns()}",
             signal_id=signal_data["id"],
             pair=signal_data["pair"],
             order_type=OrderType(signal_data.get("order_type", "BUY")),
@@ -333,7 +394,7 @@ class AdvancedExecutionEngine(ExecutionEngine):
                     await self._setup_trailing_stop(order, result["ticket"])
                 
                 # Store order
-                self.active_orders[order.id] = order
+                self._track_active_order(order)
                 self.order_tracking[result["ticket"]] = order.id
                 
                 # Process any immediate commands
@@ -361,7 +422,7 @@ class AdvancedExecutionEngine(ExecutionEngine):
                 lot_size=order.lot_size,
                 entry_price=order.entry_price,
                 stop_loss=order.stop_loss,
-                take_profits=[tp.price for tp in order.tp_levels[:1]]  # Only first TP for pending
+                take_profits=[order.tp_levels[0].price] if order.tp_levels else []  # Only first TP for pending
             )
             
             if result["status"] == "success":
@@ -371,8 +432,8 @@ class AdvancedExecutionEngine(ExecutionEngine):
                 self.order_tracking[result["ticket"]] = order.id
                 
                 # Set expiry
-                expiry_time = datetime.utcnow() + timedelta(hours=order.smart_entry_config.pending_order_expiry_hours)
-                asyncio.create_task(self._handle_pending_order_expiry(order.id, expiry_time))
+                expiry_seconds = order.smart_entry_config.pending_order_expiry_hours * 3600
+                asyncio.create_task(self._handle_pending_order_expiry(order.id, expiry_seconds))
             
             return result
             
@@ -380,6 +441,25 @@ class AdvancedExecutionEngine(ExecutionEngine):
             logger.error(f"Error placing pending order: {e}")
             return {"status": "error", "message": str(e)}
     
+    async def _handle_pending_order_expiry(self, order_id: str, expiry_seconds: float):
+        """Cancel a pending order that is still unfilled once it expires"""
+        try:
+            await asyncio.sleep(expiry_seconds)
+            
+            order = self.pending_orders.get(order_id)
+            if not order or order.status != OrderStatus.PENDING:
+                return
+            
+            result = await self.mt5_bridge.cancel_order(order.mt5_ticket)
+            if result["status"] == "success":
+                order.status = OrderStatus.CANCELLED
+                self.pending_orders.pop(order_id, None)
+                self.order_tracking.pop(order.mt5_ticket, None)
+                logger.info(f"Pending order {order_id} expired and was cancelled")
+            
+        except Exception as e:
+            logger.error(f"Error expiring pending order {order_id}: {e}")
+    
     async def _setup_conditional_order(self, order: AdvancedTradingOrder) -> Dict[str, Any]:
         """Setup conditional order execution"""
         try:
@@ -399,14 +479,21 @@ class AdvancedExecutionEngine(ExecutionEngine):
             logger.error(f"Error setting up conditional order: {e}")
             return {"status": "error", "message": str(e)}
     
-    async def _check_smart_entry_conditions(self, order: AdvancedTradingOrder) -> bool:
+    async def _check_smart_entry_conditions(self, order: AdvancedTradingOrder,
+                                            current_price: Optional[float] = None) -> bool:
         """Check if smart entry conditions are met"""
         if not self.mt5_bridge:
             return True  # Always allow in simulation
         
         try:
-            current_price = await self.mt5_bridge.get_current_price(order.pair)
-            spread = await self.mt5_bridge.get_spread(order.pair)
+            if current_price is None:
+                # Fetch price and spread together rather than back to back
+                current_price, spread = await asyncio.gather(
+                    self.mt5_bridge.get_current_price(order.pair),
+                    self.mt5_bridge.get_spread(order.pair)
+                )
+            else:
+                spread = await self.mt5_bridge.get_spread(order.pair)
             
             config = order.smart_entry_config
             
@@ -416,11 +503,8 @@ class AdvancedExecutionEngine(ExecutionEngine):
                 return False
             
             # Check entry price deviation
-            price_diff_pips = abs(current_price - order.entry_price)
-            if order.pair.endswith('JPY'):
-                price_diff_pips *= 100
-            else:
-                price_diff_pips *= 10000
+            pip_scale, _ = _pip_params(order.pair)
+            price_diff_pips = abs(current_price - order.entry_price) * pip_scale
             
             if price_diff_pips > config.max_entry_deviation_pips:
                 logger.info(f"Price deviation too large: {price_diff_pips} > {config.max_entry_deviation_pips}")
@@ -438,30 +522,37 @@ class AdvancedExecutionEngine(ExecutionEngine):
             if not order.tp_levels or len(order.tp_levels) <= 1:
                 return  # Single or no TP, already handled
             
-            # Calculate lot sizes for each TP level
-            total_lots = order.lot_size
+            if not self.mt5_bridge:
+                return  # Simulation mode, nothing to place
             
-            for i, tp_level in enumerate(order.tp_levels):
-                if i == 0:
-                    # Modify primary order with first TP
-                    await self.mt5_bridge.modify_order(
-                        primary_ticket,
-                        take_profit=tp_level.price
+            # Modify primary order with first TP, and create the orders for the
+            # other TP levels alongside it rather than one round-trip at a time
+            total_lots = order.lot_size
+            results = await asyncio.gather(
+                self.mt5_bridge.modify_order(
+                    primary_ticket,
+                    take_profit=order.tp_levels[0].price
+                ),
+                *(
+                    self.mt5_bridge.place_order(
+                        pair=order.pair,
+                        order_type=order.order_type.value,
+                        lot_size=total_lots * (tp_level.lot_percentage / 100),
+                        entry_price=order.entry_price,
+                        stop_loss=order.stop_loss,
+                        take_profits=[tp_level.price],
+                        comment=f"TP{tp_level.level}_from_{primary_ticket}"
                     )
-                else:
-                    # Create additional orders for other TP levels
-                    tp_lot_size = total_lots * (tp_level.lot_percentage / 100)
-                    
-                    if self.mt5_bridge:
-                        await self.mt5_bridge.place_order(
-                            pair=order.pair,
-                            order_type=order.order_type.value,
-                            lot_size=tp_lot_size,
-                            entry_price=order.entry_price,
-                            stop_loss=order.stop_loss,
-                            take_profits=[tp_level.price],
-                            comment=f"TP{tp_level.level}_from_{primary_ticket}"
-                        )
+                    for tp_level in order.tp_levels[1:]
+                ),
+                return_exceptions=True
+            )
+            
+            for tp_level, result in zip(order.tp_levels, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error setting up TP{tp_level.level} for order {order.id}: {result}")
+                elif result.get("status") != "success":
+                    logger.warning(f"TP{tp_level.level} for order {order.id} not placed: {result.get('message')}")
             
             logger.info(f"Setup {len(order.tp_levels)} TP levels for order {order.id}")
             
@@ -481,16 +572,21 @@ class AdvancedExecutionEngine(ExecutionEngine):
     
     async def _monitor_trailing_stop(self, order: AdvancedTradingOrder, ticket: int):
         """Monitor and update trailing stop loss"""
+        if not self.mt5_bridge:
+            return  # No prices to trail against in simulation mode
+        
+        prices = self._subscribe_price(order.pair)
         try:
             best_price = order.entry_price
+            pip_scale, _ = _pip_params(order.pair)  # A pair's pip scale never changes mid-trade
             
             while order.id in self.active_orders:
-                if not self.mt5_bridge:
-                    await asyncio.sleep(5)
+                try:
+                    # Bounded so a closed order is noticed even while the feed is failing
+                    current_price = await asyncio.wait_for(prices.get(), 5.0)
+                except asyncio.TimeoutError:
                     continue
                 
-                current_price = await self.mt5_bridge.get_current_price(order.pair)
-                
                 # Determine if we should trail
                 should_trail = False
                 
@@ -505,16 +601,12 @@ class AdvancedExecutionEngine(ExecutionEngine):
                 
                 if should_trail:
                     # Calculate new SL
-                    pip_distance = order.trailing_sl_distance_pips
-                    if order.pair.endswith('JPY'):
-                        pip_value = 0.01
-                    else:
-                        pip_value = 0.0001
+                    trail_distance = order.trailing_sl_distance_pips / pip_scale
                     
                     if order.order_type == OrderType.BUY:
-                        new_sl = best_price - (pip_distance * pip_value)
+                        new_sl = best_price - trail_distance
                     else:
-                        new_sl = best_price + (pip_distance * pip_value)
+                        new_sl = best_price + trail_distance
                     
                     # Update SL if it's better than current
                     if ((order.order_type == OrderType.BUY and new_sl > order.stop_loss) or
@@ -525,10 +617,10 @@ class AdvancedExecutionEngine(ExecutionEngine):
                         
                         logger.info(f"Trailing stop updated for {order.id}: new SL {new_sl}")
                 
-                await asyncio.sleep(1)  # Check every second
-                
         except Exception as e:
             logger.error(f"Error in trailing stop monitoring: {e}")
+        finally:
+            self._unsubscribe_price(order.pair, prices)
     
     async def process_provider_command_advanced(self, command: str, provider_id: str, 
                                               signal_id: str = None) -> Dict[str, Any]:
@@ -537,38 +629,40 @@ class AdvancedExecutionEngine(ExecutionEngine):
             command = command.lower().strip()
             
             # Find relevant orders
-            relevant_orders = []
-            for order in self.active_orders.values():
-                if order.provider_id == provider_id:
-                    if signal_id is None or order.signal_id == signal_id:
-                        relevant_orders.append(order)
+            relevant_orders = [
+                order for order in self._provider_orders(provider_id)
+                if signal_id is None or order.signal_id == signal_id
+            ]
             
             if not relevant_orders:
                 return {"status": "error", "message": "No relevant orders found"}
             
             # Process command
-            if "close" in command and "%" in command:
-                percentage = self._extract_percentage(command)
-                return await self._close_orders_percentage(relevant_orders, percentage)
+            matches = {}
+            for found in _PROVIDER_COMMAND_RE.finditer(command):
+                matches.setdefault(found.lastgroup, found)
+            kind = next((k for k in _PROVIDER_COMMAND_PRIORITY if k in matches), None)
+            match = matches.get(kind)
             
-            elif "close all" in command:
+            if kind == "close_percent":
+                return await self._close_orders_percentage(relevant_orders, float(match.group("percent")))
+            
+            elif kind == "close_all":
                 return await self._close_all_orders(relevant_orders)
             
-            elif "tp to" in command:
-                new_tp = self._extract_price(command)
-                return await self._modify_all_tp(relevant_orders, new_tp)
+            elif kind == "tp_to":
+                return await self._modify_all_tp(relevant_orders, float(match.group("tp_price")))
             
-            elif "sl to" in command:
-                new_sl = self._extract_price(command)
-                return await self._modify_all_sl(relevant_orders, new_sl)
+            elif kind == "sl_to":
+                return await self._modify_all_sl(relevant_orders, float(match.group("sl_price")))
             
-            elif "break even" in command or "be" in command:
+            elif kind == "break_even":
                 return await self._move_all_to_break_even(relevant_orders)
             
-            elif "trailing" in command:
+            elif kind == "trailing":
                 return await self._enable_trailing_stops(relevant_orders)
             
-            elif "cancel" in command:
+            elif kind == "cancel":
                 return await self._cancel_pending_orders(relevant_orders)
             
             return {"status": "error", "message": "Unknown command"}
@@ -589,6 +683,53 @@ class AdvancedExecutionEngine(ExecutionEngine):
         
         return {"status": "success", "results": results, "orders_affected": len(results)}
     
+    async def _close_all_orders(self, orders: List[AdvancedTradingOrder]) -> Dict[str, Any]:
+        """Close multiple orders in full"""
+        return await self._close_orders_percentage(orders, 100.0)
+    
+    async def _modify_all_tp(self, orders: List[AdvancedTradingOrder], new_tp: float) -> Dict[str, Any]:
+        """Move take profit of multiple orders"""
+        results = [await self._modify_take_profit(order, new_tp) for order in orders]
+        return {"status": "success", "results": results, "orders_affected": len(results)}
+    
+    async def _modify_all_sl(self, orders: List[AdvancedTradingOrder], new_sl: float) -> Dict[str, Any]:
+        """Move stop loss of multiple orders"""
+        results = [await self._modify_stop_loss(order, new_sl) for order in orders]
+        return {"status": "success", "results": results, "orders_affected": len(results)}
+    
+    async def _move_all_to_break_even(self, orders: List[AdvancedTradingOrder]) -> Dict[str, Any]:
+        """Move stop loss of multiple orders to their entry price"""
+        results = [await self._move_to_break_even(order) for order in orders]
+        return {"status": "success", "results": results, "orders_affected": len(results)}
+    
+    async def _enable_trailing_stops(self, orders: List[AdvancedTradingOrder]) -> Dict[str, Any]:
+        """Turn on trailing stops for orders that don't have one yet"""
+        enabled = 0
+        for order in orders:
+            if not order.trailing_sl_enabled:
+                order.trailing_sl_enabled = True
+                await self._setup_trailing_stop(order, order.mt5_ticket)
+                enabled += 1
+        
+        return {"status": "success", "orders_affected": enabled}
+    
+    async def _cancel_pending_orders(self, orders: List[AdvancedTradingOrder]) -> Dict[str, Any]:
+        """Cancel the pending orders among multiple orders"""
+        results = []
+        
+        for order in orders:
+            if order.status == OrderStatus.PENDING:
+                if self.mt5_bridge:
+                    result = await self.mt5_bridge.cancel_order(order.mt5_ticket)
+                else:
+                    result = {"status": "success"}  # Simulation
+                
+                if result["status"] == "success":
+                    order.status = OrderStatus.CANCELLED
+                results.append(result)
+        
+        return {"status": "success", "results": results, "orders_affected": len(results)}
+    
     async def _place_primary_order(self, order: AdvancedTradingOrder) -> Dict[str, Any]:
         """Place the primary order"""
         if not self.mt5_bridge:
@@ -599,15 +740,13 @@ class AdvancedExecutionEngine(ExecutionEngine):
             return {"status": "success", "ticket": order.mt5_ticket}
         
         # Real MT5 execution
-        first_tp = order.tp_levels[0].price if order.tp_levels else None
-        
         return await self.mt5_bridge.place_order(
             pair=order.pair,
             order_type=order.order_type.value,
             lot_size=order.lot_size,
             entry_price=order.entry_price,
             stop_loss=order.stop_loss,
-            take_profits=[first_tp] if first_tp else []
+            take_profits=[order.tp_levels[0].price] if order.tp_levels else []
         )
     
     async def _queue_for_smart_execution(self, order: AdvancedTradingOrder) -> Dict[str, Any]:
@@ -625,12 +764,18 @@ class AdvancedExecutionEngine(ExecutionEngine):
     
     async def _monitor_smart_execution(self, order: AdvancedTradingOrder):
         """Monitor order for smart execution conditions"""
+        prices = self._subscribe_price(order.pair)
         try:
             max_wait_time = 300  # 5 minutes timeout
-            start_time = datetime.utcnow()
+            deadline = time.monotonic() + max_wait_time
             
-            while (datetime.utcnow() - start_time).total_seconds() < max_wait_time:
-                if await self._check_smart_entry_conditions(order):
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    # The budget also covers waiting, so a silent feed can't hold the order forever
+                    current_price = await asyncio.wait_for(prices.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if await self._check_smart_entry_conditions(order, current_price):
                     # Conditions met, execute order
                     result = await self._execute_market_order(order)
                     
@@ -639,8 +784,6 @@ class AdvancedExecutionEngine(ExecutionEngine):
                         self.pending_orders.pop(order.id, None)
                         logger.info(f"Smart execution completed for order {order.id}")
                         return
-                
-                await asyncio.sleep(1)  # Check every second
             
             # Timeout reached
             logger.warning(f"Smart execution timeout for order {order.id}")
@@ -648,6 +791,8 @@ class AdvancedExecutionEngine(ExecutionEngine):
             
         except Exception as e:
             logger.error(f"Error in smart execution monitoring: {e}")
+        finally:
+            self._unsubscribe_price(order.pair, prices)
     
     def get_advanced_order_status(self, order_id: str) -> Dict[str, Any]:
         """Get detailed order status"""
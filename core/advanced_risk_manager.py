@@ -3,8 +3,10 @@ SignalOS Advanced Risk Manager
 Comprehensive risk management with provider-specific controls
 """
 import asyncio
+from bisect import bisect_right
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Deque, Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import logging
@@ -20,7 +22,7 @@ class DrawdownAction(Enum):
     REDUCE_LOT_SIZES = "REDUCE_LOT_SIZES"
     ALERT_ONLY = "ALERT_ONLY"
 
-@dataclass
+@dataclass(slots=True)
 class ProviderRiskSettings:
     provider_id: str
     max_daily_loss: float = 500.0
@@ -29,7 +31,7 @@ class ProviderRiskSettings:
     risk_per_trade_percent: float = 2.0
     enabled: bool = True
     
-@dataclass
+@dataclass(slots=True)
 class PairRiskSettings:
     pair: str
     max_exposure_lots: float = 1.0
@@ -37,7 +39,7 @@ class PairRiskSettings:
     max_spread_pips: float = 5.0
     enabled: bool = True
 
-@dataclass
+@dataclass(slots=True)
 class AdvancedDrawdownSettings:
     max_daily_drawdown_percent: float = 5.0
     max_daily_drawdown_amount: float = 1000.0
@@ -46,7 +48,7 @@ class AdvancedDrawdownSettings:
     drawdown_action: DrawdownAction = DrawdownAction.STOP_NEW_SIGNALS
     recovery_threshold_percent: float = 2.0  # Allow trading again when equity recovers by this %
 
-@dataclass
+@dataclass(slots=True)
 class MarginSettings:
     min_margin_level_percent: float = 100.0  # Minimum margin level to allow new trades
     margin_call_action: DrawdownAction = DrawdownAction.CLOSE_LOSING_POSITIONS
@@ -58,6 +60,7 @@ class AdvancedRiskManager(RiskManager):
     def __init__(self, settings: RiskSettings = None):
         super().__init__(settings)
         self.provider_settings: Dict[str, ProviderRiskSettings] = {}
+        self._default_provider_settings = ProviderRiskSettings(provider_id="")  # Reported for providers without settings
         self.pair_settings: Dict[str, PairRiskSettings] = {}
         self.drawdown_settings = AdvancedDrawdownSettings()
         self.margin_settings = MarginSettings()
@@ -65,35 +68,45 @@ class AdvancedRiskManager(RiskManager):
         # Advanced tracking
         self.provider_stats: Dict[str, Dict[str, Any]] = {}
         self.pair_exposure: Dict[str, float] = {}
-        self.drawdown_history: List[Dict[str, Any]] = []
+        self.pair_trades_today: Dict[str, int] = {}
+        self._trades_day = datetime.utcnow().date()
+        self.drawdown_history: Deque[Dict[str, Any]] = deque(maxlen=100)  # Keep only recent history
+        self._recent_max_drawdown: Optional[Dict[str, Any]] = None  # Largest record in drawdown_history
         self.peak_balance = self.account_balance
         self.current_drawdown_percent = 0.0
+        self._last_equity_seen: Optional[float] = None  # Equity the drawdown stats were last computed for
         
         # Signal frequency tracking
-        self.signal_frequency: Dict[str, List[datetime]] = {}
+        self.signal_frequency: Dict[str, Deque[datetime]] = {}  # oldest first
         self.max_signals_per_minute = 10
         self.max_signals_per_hour = 100
         
     async def check_signal_advanced(self, signal_data: Dict[str, Any]) -> Tuple[bool, str]:
         """Advanced signal validation with provider and pair specific checks"""
         try:
-            # Basic checks first
-            basic_allowed = await self.check_signal(signal_data)
+            # Basic and margin checks may both wait on MT5, so run them together;
+            # their results are still applied in the order below
+            basic_allowed, (margin_allowed, margin_reason) = await asyncio.gather(
+                self.check_signal(signal_data),
+                self._check_margin_levels()
+            )
             if not basic_allowed:
                 return False, "Failed basic risk checks"
             
             provider_id = signal_data.get('provider_id')
             pair = signal_data.get('pair')
+            now = datetime.utcnow()  # One clock read shared by every check below
+            self._maybe_rollover_day(now)
             
             # Provider-specific checks
             if provider_id:
-                provider_allowed, provider_reason = self._check_provider_limits(provider_id, signal_data)
+                provider_allowed, provider_reason = self._check_provider_limits(provider_id, signal_data, now)
                 if not provider_allowed:
                     return False, provider_reason
             
             # Pair-specific checks
             if pair:
-                pair_allowed, pair_reason = self._check_pair_limits(pair, signal_data)
+                pair_allowed, pair_reason = self._check_pair_limits(pair, signal_data, now)
                 if not pair_allowed:
                     return False, pair_reason
             
@@ -103,12 +116,11 @@ class AdvancedRiskManager(RiskManager):
                 return False, drawdown_reason
             
             # Margin level checks
-            margin_allowed, margin_reason = await self._check_margin_levels()
             if not margin_allowed:
                 return False, margin_reason
             
             # Signal frequency checks
-            freq_allowed, freq_reason = self._check_signal_frequency(provider_id, pair)
+            freq_allowed, freq_reason = self._check_signal_frequency(provider_id, pair, now)
             if not freq_allowed:
                 return False, freq_reason
             
@@ -118,29 +130,31 @@ class AdvancedRiskManager(RiskManager):
             logger.error(f"Error in advanced signal check: {e}")
             return False, f"Risk check error: {str(e)}"
     
-    def _check_provider_limits(self, provider_id: str, signal_data: Dict[str, Any]) -> Tuple[bool, str]:
+    def _check_provider_limits(self, provider_id: str, signal_data: Dict[str, Any], now: datetime) -> Tuple[bool, str]:
         """Check provider-specific risk limits"""
         try:
             provider_settings = self.provider_settings.get(provider_id)
             if not provider_settings or not provider_settings.enabled:
                 return True, ""
             
+            today = now.date()
+            
             # Initialize provider stats if not exists
             if provider_id not in self.provider_stats:
                 self.provider_stats[provider_id] = {
                     'daily_pnl': 0.0,
                     'trades_today': 0,
                     'active_trades': 0,
-                    'last_reset': datetime.utcnow().date()
+                    'last_reset': today
                 }
             
             stats = self.provider_stats[provider_id]
             
             # Reset daily stats if new day
-            if stats['last_reset'] != datetime.utcnow().date():
+            if stats['last_reset'] != today:
                 stats['daily_pnl'] = 0.0
                 stats['trades_today'] = 0
-                stats['last_reset'] = datetime.utcnow().date()
+                stats['last_reset'] = today
             
             # Check daily loss limit
             if stats['daily_pnl'] <= -provider_settings.max_daily_loss:
@@ -163,7 +177,7 @@ class AdvancedRiskManager(RiskManager):
             logger.error(f"Error checking provider limits: {e}")
             return True, ""  # Allow on error
     
-    def _check_pair_limits(self, pair: str, signal_data: Dict[str, Any]) -> Tuple[bool, str]:
+    def _check_pair_limits(self, pair: str, signal_data: Dict[str, Any], now: datetime) -> Tuple[bool, str]:
         """Check pair-specific risk limits"""
         try:
             pair_settings = self.pair_settings.get(pair)
@@ -178,13 +192,7 @@ class AdvancedRiskManager(RiskManager):
                 return False, f"Pair {pair} exposure limit exceeded ({current_exposure + requested_lots} > {pair_settings.max_exposure_lots})"
             
             # Check daily trades for this pair
-            today = datetime.utcnow().date()
-            pair_trades_today = len([
-                trade for trade in self.hourly_trades
-                if trade.date() == today and getattr(trade, 'pair', None) == pair
-            ])
-            
-            if pair_trades_today >= pair_settings.max_trades_per_day:
+            if self.pair_trades_today.get(pair, 0) >= pair_settings.max_trades_per_day:
                 return False, f"Pair {pair} daily trade limit exceeded"
             
             return True, ""
@@ -193,6 +201,13 @@ class AdvancedRiskManager(RiskManager):
             logger.error(f"Error checking pair limits: {e}")
             return True, ""  # Allow on error
     
+    def _maybe_rollover_day(self, now: datetime):
+        """Reset per-day counters when the UTC date changes"""
+        today = now.date()
+        if today != self._trades_day:
+            self.pair_trades_today.clear()
+            self._trades_day = today
+    
     def _check_advanced_drawdown(self) -> Tuple[bool, str]:
         """Check advanced drawdown rules"""
         try:
@@ -246,25 +261,20 @@ class AdvancedRiskManager(RiskManager):
             logger.error(f"Error checking margin levels: {e}")
             return True, ""  # Allow on error
     
-    def _check_signal_frequency(self, provider_id: str, pair: str) -> Tuple[bool, str]:
+    def _check_signal_frequency(self, provider_id: str, pair: str, now: datetime) -> Tuple[bool, str]:
         """Check signal frequency limits"""
         try:
-            now = datetime.utcnow()
+            minute_ago = now - timedelta(minutes=1)
+            hour_ago = now - timedelta(hours=1)
             
-            # Check overall signal frequency
-            recent_signals = len([
-                ts for ts in self.hourly_trades
-                if (now - ts).total_seconds() < 60  # Last minute
-            ])
+            # Check overall signal frequency; hourly_trades is appended in time order
+            recent_signals = len(self.hourly_trades) - bisect_right(self.hourly_trades, minute_ago)
             
             if recent_signals >= self.max_signals_per_minute:
                 return False, f"Signal frequency too high: {recent_signals} signals in last minute"
             
             # Check hourly frequency
-            hourly_signals = len([
-                ts for ts in self.hourly_trades
-                if (now - ts).total_seconds() < 3600  # Last hour
-            ])
+            hourly_signals = len(self.hourly_trades) - bisect_right(self.hourly_trades, hour_ago)
             
             if hourly_signals >= self.max_signals_per_hour:
                 return False, f"Hourly signal limit exceeded: {hourly_signals} signals"
@@ -273,14 +283,12 @@ class AdvancedRiskManager(RiskManager):
             if provider_id:
                 provider_key = f"provider_{provider_id}"
                 if provider_key not in self.signal_frequency:
-                    self.signal_frequency[provider_key] = []
+                    self.signal_frequency[provider_key] = deque()
                 
                 provider_signals = self.signal_frequency[provider_key]
                 # Clean old signals (older than 1 hour)
-                provider_signals[:] = [
-                    ts for ts in provider_signals
-                    if (now - ts).total_seconds() < 3600
-                ]
+                while provider_signals and provider_signals[0] <= hour_ago:
+                    provider_signals.popleft()
                 
                 if len(provider_signals) >= 50:  # Max 50 signals per hour per provider
                     return False, f"Provider {provider_id} signal frequency too high"
@@ -289,14 +297,12 @@ class AdvancedRiskManager(RiskManager):
             if pair:
                 pair_key = f"pair_{pair}"
                 if pair_key not in self.signal_frequency:
-                    self.signal_frequency[pair_key] = []
+                    self.signal_frequency[pair_key] = deque()
                 
                 pair_signals = self.signal_frequency[pair_key]
                 # Clean old signals
-                pair_signals[:] = [
-                    ts for ts in pair_signals
-                    if (now - ts).total_seconds() < 3600
-                ]
+                while pair_signals and pair_signals[0] <= hour_ago:
+                    pair_signals.popleft()
                 
                 if len(pair_signals) >= 20:  # Max 20 signals per hour per pair
                     return False, f"Pair {pair} signal frequency too high"
@@ -310,6 +316,11 @@ class AdvancedRiskManager(RiskManager):
     def _update_drawdown_stats(self):
         """Update drawdown statistics"""
         try:
+            # Nothing moved since the last update
+            if self.account_equity == self._last_equity_seen:
+                return
+            self._last_equity_seen = self.account_equity
+            
             # Update peak balance
             if self.account_equity > self.peak_balance:
                 self.peak_balance = self.account_equity
@@ -322,17 +333,22 @@ class AdvancedRiskManager(RiskManager):
             
             # Record drawdown event if significant
             if self.current_drawdown_percent > 1.0:  # More than 1% drawdown
-                self.drawdown_history.append({
+                record = {
                     'timestamp': datetime.utcnow(),
                     'peak_balance': self.peak_balance,
                     'current_equity': self.account_equity,
                     'drawdown_percent': self.current_drawdown_percent,
                     'drawdown_amount': self.peak_balance - self.account_equity
-                })
+                }
+                full = len(self.drawdown_history) == self.drawdown_history.maxlen
+                dropped = self.drawdown_history[0] if full else None
+                self.drawdown_history.append(record)  # Evicts the oldest record when full
                 
-                # Keep only recent history
-                if len(self.drawdown_history) > 100:
-                    self.drawdown_history = self.drawdown_history[-100:]
+                if dropped is not None and dropped is self._recent_max_drawdown:
+                    self._recent_max_drawdown = max(self.drawdown_history, key=lambda x: x['drawdown_percent'])
+                elif (self._recent_max_drawdown is None or
+                        record['drawdown_percent'] > self._recent_max_drawdown['drawdown_percent']):
+                    self._recent_max_drawdown = record
             
         except Exception as e:
             logger.error(f"Error updating drawdown stats: {e}")
@@ -341,11 +357,10 @@ class AdvancedRiskManager(RiskManager):
         """Check if system is in recovery mode"""
         try:
             # Check if we recently hit a major drawdown and haven't recovered enough
-            if not self.drawdown_history:
+            recent_drawdown = self._recent_max_drawdown
+            if not recent_drawdown:
                 return False
             
-            recent_drawdown = max(self.drawdown_history, key=lambda x: x['drawdown_percent'])
-            
             # If max recent drawdown was significant and we haven't recovered enough
             if recent_drawdown['drawdown_percent'] >= self.drawdown_settings.max_daily_drawdown_percent * 0.8:
                 recovery_needed = self.drawdown_settings.recovery_threshold_percent
@@ -426,24 +441,26 @@ class AdvancedRiskManager(RiskManager):
                     stats['active_trades'] = max(0, stats['active_trades'] - 1)
             
             # Update pair exposure
+            now = datetime.utcnow()
             if pair:
                 if trade_data.get('status') == 'opened':
                     self.pair_exposure[pair] = self.pair_exposure.get(pair, 0) + lot_size
+                    self._maybe_rollover_day(now)
+                    self.pair_trades_today[pair] = self.pair_trades_today.get(pair, 0) + 1
                 elif trade_data.get('status') == 'closed':
                     self.pair_exposure[pair] = max(0, self.pair_exposure.get(pair, 0) - lot_size)
             
             # Update signal frequency tracking
-            now = datetime.utcnow()
             if provider_id:
                 provider_key = f"provider_{provider_id}"
                 if provider_key not in self.signal_frequency:
-                    self.signal_frequency[provider_key] = []
+                    self.signal_frequency[provider_key] = deque()
                 self.signal_frequency[provider_key].append(now)
             
             if pair:
                 pair_key = f"pair_{pair}"
                 if pair_key not in self.signal_frequency:
-                    self.signal_frequency[pair_key] = []
+                    self.signal_frequency[pair_key] = deque()
                 self.signal_frequency[pair_key].append(now)
             
         except Exception as e:
@@ -462,18 +479,14 @@ class AdvancedRiskManager(RiskManager):
                     'peak_balance': self.peak_balance,
                     'max_daily_drawdown_limit': self.drawdown_settings.max_daily_drawdown_percent,
                     'in_recovery_mode': self._is_in_recovery_mode(),
-                    'recent_max_drawdown': max([dd['drawdown_percent'] for dd in self.drawdown_history], default=0)
+                    'recent_max_drawdown': self._recent_max_drawdown['drawdown_percent'] if self._recent_max_drawdown else 0
                 },
                 'provider_stats': {
                     pid: {
                         'daily_pnl': stats['daily_pnl'],
                         'trades_today': stats['trades_today'],
                         'active_trades': stats['active_trades'],
-                        'settings': {
-                            'max_daily_loss': self.provider_settings.get(pid, ProviderRiskSettings(pid)).max_daily_loss,
-                            'max_concurrent': self.provider_settings.get(pid, ProviderRiskSettings(pid)).max_concurrent_trades,
-                            'enabled': self.provider_settings.get(pid, ProviderRiskSettings(pid)).enabled
-                        }
+                        'settings': self._provider_settings_summary(pid)
                     }
                     for pid, stats in self.provider_stats.items()
                 },
@@ -491,6 +504,15 @@ class AdvancedRiskManager(RiskManager):
             logger.error(f"Error getting advanced risk status: {e}")
             return self.get_risk_status()  # Fallback to basic status
     
+    def _provider_settings_summary(self, provider_id: str) -> Dict[str, Any]:
+        """Limits reported for a provider, falling back to the defaults"""
+        settings = self.provider_settings.get(provider_id, self._default_provider_settings)
+        return {
+            'max_daily_loss': settings.max_daily_loss,
+            'max_concurrent': settings.max_concurrent_trades,
+            'enabled': settings.enabled
+        }
+    
     def trigger_emergency_action(self, action: DrawdownAction, reason: str) -> Dict[str, Any]:
         """Trigger emergency risk management action"""
         try:
@@ -25,7 +25,7 @@ class ParseConfidence(Enum):
     LOW = "LOW"
     INVALID = "INVALID"
 
-@dataclass
+@dataclass(slots=True)
 class ParsedSignal:
     signal_id: str
     original_text: str
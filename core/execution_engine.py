@@ -5,7 +5,7 @@ Handles order placement, modification, and trade management
 import json
 import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set
 from dataclasses import dataclass
 from enum import Enum
 import logging
@@ -28,7 +28,7 @@ class OrderStatus(Enum):
     PARTIALLY_CLOSED = "PARTIALLY_CLOSED"
     CLOSED = "CLOSED"
 
-@dataclass
+@dataclass(slots=True)
 class TradingOrder:
     id: str
     signal_id: str
@@ -59,6 +59,27 @@ class ExecutionEngine:
         self.risk_manager = risk_manager
         self.active_orders: Dict[str, TradingOrder] = {}
         self.order_history: List[TradingOrder] = []
+        self._orders_by_provider: Dict[str, Set[str]] = {}  # provider_id -> active order ids
+    
+    def _track_active_order(self, order: TradingOrder):
+        """Store an executed order and index it by provider"""
+        self.active_orders[order.id] = order
+        self._orders_by_provider.setdefault(order.provider_id, set()).add(order.id)
+    
+    def _provider_orders(self, provider_id: str) -> List[TradingOrder]:
+        """Active orders from a provider, dropping ids removed from active_orders since"""
+        order_ids = self._orders_by_provider.get(provider_id)
+        if not order_ids:
+            return []
+        
+        orders = []
+        for order_id in list(order_ids):
+            order = self.active_orders.get(order_id)
+            if order is None:
+                order_ids.discard(order_id)
+            else:
+                orders.append(order)
+        return orders
         
     async def process_signal(self, signal_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process incoming trading signal"""
@@ -84,7 +105,7 @@ class ExecutionEngine:
             result = await self._execute_order(order)
             
             if result["status"] == "success":
-                self.active_orders[order.id] = order
+                self._track_active_order(order)
                 logger.info(f"Order executed successfully: {order.id}")
             
             return result
@@ -302,8 +323,8 @@ class ExecutionEngine:
     async def _close_provider_positions(self, provider_id: str, percentage: float) -> Dict[str, Any]:
         """Close percentage of all positions from a provider"""
         results = []
-        for order in self.active_orders.values():
-            if order.provider_id == provider_id and order.status == OrderStatus.EXECUTED:
+        for order in self._provider_orders(provider_id):
+            if order.status == OrderStatus.EXECUTED:
                 result = await self._close_partial(order, percentage)
                 results.append(result)
         
@@ -312,8 +333,8 @@ class ExecutionEngine:
     async def _modify_provider_tp(self, provider_id: str, new_tp: float) -> Dict[str, Any]:
         """Modify take profit for all provider positions"""
         results = []
-        for order in self.active_orders.values():
-            if order.provider_id == provider_id and order.status == OrderStatus.EXECUTED:
+        for order in self._provider_orders(provider_id):
+            if order.status == OrderStatus.EXECUTED:
                 result = await self._modify_take_profit(order, new_tp)
                 results.append(result)
         
@@ -322,8 +343,8 @@ class ExecutionEngine:
     async def _modify_provider_sl(self, provider_id: str, new_sl: float) -> Dict[str, Any]:
         """Modify stop loss for all provider positions"""
         results = []
-        for order in self.active_orders.values():
-            if order.provider_id == provider_id and order.status == OrderStatus.EXECUTED:
+        for order in self._provider_orders(provider_id):
+            if order.status == OrderStatus.EXECUTED:
                 result = await self._modify_stop_loss(order, new_sl)
                 results.append(result)
         
@@ -332,8 +353,8 @@ class ExecutionEngine:
     async def _break_even_provider_positions(self, provider_id: str) -> Dict[str, Any]:
         """Move all provider positions to break even"""
         results = []
-        for order in self.active_orders.values():
-            if order.provider_id == provider_id and order.status == OrderStatus.EXECUTED:
+        for order in self._provider_orders(provider_id):
+            if order.status == OrderStatus.EXECUTED:
                 result = await self._move_to_break_even(order)
                 results.append(result)
         
@@ -342,8 +363,8 @@ class ExecutionEngine:
     async def _cancel_provider_pending(self, provider_id: str) -> Dict[str, Any]:
         """Cancel all pending orders from provider"""
         results = []
-        for order in self.active_orders.values():
-            if order.provider_id == provider_id and order.status == OrderStatus.PENDING:
+        for order in self._provider_orders(provider_id):
+            if order.status == OrderStatus.PENDING:
                 if self.mt5_bridge:
                     result = await self.mt5_bridge.cancel_order(order.mt5_ticket)
                 else:
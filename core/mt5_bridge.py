@@ -3,12 +3,13 @@ SignalOS MT5 Bridge
 Communication layer with MetaTrader 5 terminals
 """
 import asyncio
-import json
+import itertools
 import os
-import subprocess
+import time
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +21,8 @@ class MT5Bridge:
         self.terminals = {}  # Active terminal connections
         self.ea_path = self.config.get("ea_path", "experts/SignalOS_EA.ex5")
         self.json_path = self.config.get("json_path", "Files/SignalOS")
+        self._command_seq = itertools.count()  # keeps file names unique for concurrent commands
+        self._json_dir_ready = False
         
     async def connect_terminal(self, terminal_id: str, login: str, password: str, server: str) -> Dict[str, Any]:
         """Connect to MT5 terminal"""
@@ -266,23 +269,35 @@ class MT5Bridge:
     
     async def _send_command_to_ea(self, terminal_id: str, command: Dict[str, Any]) -> Dict[str, Any]:
         """Send command to MT5 EA via JSON file communication"""
+        if not terminal_id:
+            # No EA can answer, so don't sit out the response timeout
+            return {"status": "error", "message": "No active MT5 terminal"}
+        
         try:
+            started = time.monotonic()
+            
             # Create command file
-            command_file = f"{self.json_path}/command_{terminal_id}_{datetime.utcnow().timestamp()}.json"
-            response_file = f"{self.json_path}/response_{terminal_id}_{datetime.utcnow().timestamp()}.json"
+            stamp = f"{datetime.utcnow().timestamp()}_{next(self._command_seq)}"
+            command_file = f"{self.json_path}/command_{terminal_id}_{stamp}.json"
+            response_file = f"{self.json_path}/response_{terminal_id}_{stamp}.json"
             
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(command_file), exist_ok=True)
+            # Ensure directory exists (once per bridge)
+            if not self._json_dir_ready:
+                os.makedirs(self.json_path, exist_ok=True)
+                self._json_dir_ready = True
             
             # Add response file to command
             command["response_file"] = response_file
             
-            # Write command file
-            with open(command_file, 'w') as f:
-                json.dump(command, f, indent=2)
+            # Write command file atomically so the EA never picks up a half-written command
+            temp_file = f"{command_file}.tmp"
+            with open(temp_file, 'wb') as f:
+                f.write(orjson.dumps(command, option=orjson.OPT_INDENT_2))
+            os.replace(temp_file, command_file)
             
             # Wait for response (with timeout)
             response = await self._wait_for_response(response_file, timeout=10)
+            logger.debug(f"EA {command.get('action')} on {terminal_id} answered in {time.monotonic() - started:.3f}s")
             
             # Cleanup files
             self._cleanup_files([command_file, response_file])
@@ -295,18 +310,25 @@ class MT5Bridge:
     
     async def _wait_for_response(self, response_file: str, timeout: int = 10) -> Dict[str, Any]:
         """Wait for EA response file"""
-        start_time = datetime.utcnow()
+        deadline = time.monotonic() + timeout
+        last_seen = None  # (size, mtime) of the last partial read
         
-        while (datetime.utcnow() - start_time).total_seconds() < timeout:
-            if os.path.exists(response_file):
+        while time.monotonic() < deadline:
+            try:
+                stat = os.stat(response_file)
+            except FileNotFoundError:
+                stat = None
+            
+            # Only re-read once the EA has written to the file since the last attempt
+            if stat is not None and (stat.st_size, stat.st_mtime_ns) != last_seen:
+                last_seen = (stat.st_size, stat.st_mtime_ns)
                 try:
-                    with open(response_file, 'r') as f:
-                        response = json.load(f)
+                    with open(response_file, 'rb') as f:
+                        response = orjson.loads(f.read())
                     return response
-                except (json.JSONDecodeError, IOError):
+                except (orjson.JSONDecodeError, IOError):
                     # File might be being written, wait a bit more
-                    await asyncio.sleep(0.1)
-                    continue
+                    pass
             
             await asyncio.sleep(0.1)
         
@@ -360,25 +382,28 @@ class MT5Bridge:
             # Close original order and create multiple orders with different TPs
             lot_per_tp = original_order.get("lot_size", 0.01) / len(take_profits)
             
-            for i, tp in enumerate(take_profits):
-                if i == 0:
-                    # Modify original order with first TP
-                    await self.modify_order(ticket, take_profit=tp, terminal_id=terminal_id)
-                else:
-                    # Create additional orders for other TPs
-                    command = {
-                        "action": "place_order",
-                        "pair": original_order.get("pair"),
-                        "order_type": original_order.get("order_type"),
-                        "lot_size": lot_per_tp,
-                        "entry_price": original_order.get("entry_price"),
-                        "stop_loss": original_order.get("stop_loss"),
-                        "take_profits": [tp],
-                        "comment": f"TP{i+1}_from_{ticket}",
-                        "timestamp": datetime.utcnow().isoformat()
-                    }
-                    
-                    await self._send_command_to_ea(terminal_id, command)
+            # Create additional orders for other TPs
+            timestamp = datetime.utcnow().isoformat()
+            commands = [
+                {
+                    "action": "place_order",
+                    "pair": original_order.get("pair"),
+                    "order_type": original_order.get("order_type"),
+                    "lot_size": lot_per_tp,
+                    "entry_price": original_order.get("entry_price"),
+                    "stop_loss": original_order.get("stop_loss"),
+                    "take_profits": [tp],
+                    "comment": f"TP{i+1}_from_{ticket}",
+                    "timestamp": timestamp
+                }
+                for i, tp in enumerate(take_profits[1:], start=1)
+            ]
+            
+            # Modify original order with first TP, and send the extra orders alongside it
+            await asyncio.gather(
+                self.modify_order(ticket, take_profit=take_profits[0], terminal_id=terminal_id),
+                *(self._send_command_to_ea(terminal_id, command) for command in commands)
+            )
                     
         except Exception as e:
             logger.error(f"Error setting up multi-TP levels: {e}")
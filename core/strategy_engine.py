@@ -2,15 +2,21 @@
 SignalOS Strategy Engine
 Advanced strategy management with rules and automation
 """
-import json
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional, Any, Union
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from enum import Enum
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=256)
+def _parse_condition(condition: str) -> Dict[str, Any]:
+    """Decode a rule condition once; the JSON text never changes for a given rule"""
+    return orjson.loads(condition)
+
 class StrategyType(Enum):
     CONSERVATIVE = "CONSERVATIVE"
     AGGRESSIVE = "AGGRESSIVE"
@@ -210,32 +216,33 @@ class StrategyEngine:
     def _evaluate_rule_condition(self, rule: StrategyRule, signal_data: Dict[str, Any]) -> bool:
         """Evaluate if rule condition is met"""
         try:
-            condition = json.loads(rule.condition)
+            condition = _parse_condition(rule.condition)
+            condition_type = condition.get('type')
             
             # Simple condition evaluation
-            if condition.get('type') == 'always':
+            if condition_type == 'always':
                 return True
             
-            elif condition.get('type') == 'pair_equals':
+            elif condition_type == 'pair_equals':
                 return signal_data.get('pair') == condition.get('value')
             
-            elif condition.get('type') == 'action_equals':
+            elif condition_type == 'action_equals':
                 return signal_data.get('action') == condition.get('value')
             
-            elif condition.get('type') == 'sl_distance_greater':
+            elif condition_type == 'sl_distance_greater':
                 entry = signal_data.get('entry', 0)
                 sl = signal_data.get('sl', 0)
                 if entry and sl:
                     distance = abs(entry - sl)
                     return distance > condition.get('value', 0)
             
-            elif condition.get('type') == 'time_range':
+            elif condition_type == 'time_range':
                 current_hour = datetime.utcnow().hour
                 start_hour = condition.get('start_hour', 0)
                 end_hour = condition.get('end_hour', 23)
                 return start_hour <= current_hour <= end_hour
             
-            elif condition.get('type') == 'risk_percent_less':
+            elif condition_type == 'risk_percent_less':
                 risk = signal_data.get('risk_percent', 0)
                 return risk < condition.get('value', 100)
             
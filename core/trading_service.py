@@ -454,8 +454,11 @@ class TradingService:
         try:
             logger.warning("Emergency close all positions initiated")
             
-            for terminal_id in self.mt5_bridge.terminals.keys():
-                await self.mt5_bridge.emergency_close_all(terminal_id)
+            # Close on every terminal at once; each command can wait up to the EA timeout
+            await asyncio.gather(*(
+                self.mt5_bridge.emergency_close_all(terminal_id)
+                for terminal_id in list(self.mt5_bridge.terminals)
+            ))
             
             # Clear active orders
             self.execution_engine.active_orders.clear()
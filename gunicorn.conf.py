@@ -9,7 +9,7 @@ backlog = 2048
 
 # Worker processes
 workers = 1
-worker_class = "sync"
+worker_class = "eventlet"  # one greenlet per connection; Socket.IO needs a single worker
 worker_connections = 1000
 timeout = 300
 keepalive = 30
@@ -17,7 +17,7 @@ keepalive = 30
 # Restart workers
 max_requests = 1000
 max_requests_jitter = 50
-preload_app = True
+preload_app = False  # importing app monkey-patches eventlet; keep that out of the arbiter
 
 # Logging
 accesslog = "-"
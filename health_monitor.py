@@ -5,10 +5,9 @@ Comprehensive system health monitoring with MT5, Telegram, and EA status
 import psutil
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, Any
-import requests
-import subprocess
 from models import Signal, Trade, db
 from app import app
 
@@ -246,23 +245,27 @@ class HealthMonitor:
         }
         
         try:
-            # Get all health checks
-            system_resources = self.get_system_resources()
-            database_health = self.check_database_health()
-            mt5_health = self.check_mt5_connectivity()
-            telegram_health = self.check_telegram_status()
-            parser_health = self.check_signal_parser_health()
-            websocket_health = self.check_websocket_health()
+            # Run all health checks at once; they are independent and mostly wait on I/O
+            checks = {
+                'system': self.get_system_resources,
+                'database': self.check_database_health,
+                'mt5': self.check_mt5_connectivity,
+                'telegram': self.check_telegram_status,
+                'parser': self.check_signal_parser_health,
+                'websocket': self.check_websocket_health
+            }
+            with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+                futures = {name: executor.submit(check) for name, check in checks.items()}
+                results = {name: future.result() for name, future in futures.items()}
+            
+            database_health = results['database']
+            mt5_health = results['mt5']
+            telegram_health = results['telegram']
+            parser_health = results['parser']
+            websocket_health = results['websocket']
             
             # Compile comprehensive status
-            health_data.update({
-                'system': system_resources,
-                'database': database_health,
-                'mt5': mt5_health,
-                'telegram': telegram_health,
-                'parser': parser_health,
-                'websocket': websocket_health
-            })
+            health_data.update(results)
             
             # Update service status flags
             health_data['services'].update({
@@ -1,4 +1,4 @@
-from app import app, socketio, db
+from app import app, socketio, db, cache
 from flask import render_template, jsonify, request, session
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
@@ -763,15 +763,24 @@ def api_advanced_signal_parse():
     except Exception as e:
         return jsonify({'error': f'Advanced parsing error: {str(e)}'}), 500
 
+@cache.memoize(timeout=10)
+def _comprehensive_health():
+    """Full health report, shared by every caller for 10 seconds (it samples CPU for a second)"""
+    from health_monitor import get_system_health
+    return get_system_health()
+
 @app.route('/api/health/comprehensive', methods=['GET'])
 def api_comprehensive_health():
     """Get comprehensive system health"""
     try:
-        from health_monitor import get_system_health
-        health_data = get_system_health()
-        return jsonify(health_data)
+        response = jsonify(_comprehensive_health())
     except Exception as e:
         return jsonify({'error': f'Health check failed: {str(e)}'}), 500
+    
+    # Repeat probes within the cache window revalidate to a body-less 304
+    response.headers['Cache-Control'] = 'private, max-age=2'
+    response.add_etag()
+    return response.make_conditional(request)
 
 # SocketIO events for real-time updates
 @socketio.on('connect')
@@ -794,8 +803,7 @@ def handle_disconnect():
 def handle_get_health():
     try:
         print('Health check requested')
-        from health_monitor import get_system_health
-        health_data = get_system_health()
+        health_data = _comprehensive_health()
         socketio.emit('health_update', health_data, room=request.sid)
     except Exception as e:
         print(f'Health check error: {e}')
@@ -3,6 +3,7 @@ Database models for SignalOS
 """
 from datetime import datetime
 from enum import Enum
+from sqlalchemy import DDL, event
 from app import db
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -18,6 +19,20 @@ class SignalAction(Enum):
     BUY = "buy"
     SELL = "sell"
 
+def trigram_index(name, column):
+    """GIN trigram index backing ILIKE '%...%' admin searches (PostgreSQL only)"""
+    return db.Index(
+        name, column,
+        postgresql_using="gin",
+        postgresql_ops={column: "gin_trgm_ops"},
+    ).ddl_if(dialect="postgresql")
+
+# Trigram indexes need the pg_trgm extension
+event.listen(
+    db.Model.metadata, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 class User(UserMixin, db.Model):
     __tablename__ = "users"
     
@@ -27,7 +42,7 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(256), nullable=False)
     license_type = db.Column(db.String(50), default="free")
     active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     last_login = db.Column(db.DateTime)
     
     # Relationships
@@ -36,6 +51,9 @@ class User(UserMixin, db.Model):
     strategies = db.relationship("Strategy", back_populates="user")
     trades = db.relationship("Trade", back_populates="user")
 
+# Case-insensitive email lookups at login
+db.Index("ix_users_email_lower", db.func.lower(User.email), unique=True)
+
 class TelegramSession(db.Model):
     __tablename__ = "telegram_sessions"
     
@@ -133,6 +151,11 @@ class Strategy(db.Model):
 
 class Signal(db.Model):
     __tablename__ = "signals"
+    __table_args__ = (
+        db.Index("ix_signals_status_received_at", "status", "received_at"),
+        trigram_index("ix_signals_raw_text_trgm", "raw_text"),
+        trigram_index("ix_signals_parsed_pair_trgm", "parsed_pair"),
+    )
     
     id = db.Column(db.Integer, primary_key=True, index=True)
     channel_id = db.Column(db.Integer, db.ForeignKey("telegram_channels.id"), nullable=False)
@@ -153,7 +176,7 @@ class Signal(db.Model):
     error_message = db.Column(db.Text)
     
     # Timestamps
-    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     processed_at = db.Column(db.DateTime)
     executed_at = db.Column(db.DateTime)
     
@@ -167,7 +190,7 @@ class Trade(db.Model):
     id = db.Column(db.Integer, primary_key=True, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     terminal_id = db.Column(db.Integer, db.ForeignKey("mt5_terminals.id"), nullable=False)
-    signal_id = db.Column(db.Integer, db.ForeignKey("signals.id"))
+    signal_id = db.Column(db.Integer, db.ForeignKey("signals.id"), index=True)
     
     # Trade details
     pair = db.Column(db.String(10), nullable=False)
@@ -184,7 +207,7 @@ class Trade(db.Model):
     status = db.Column(db.String(20), default="open")
     
     # Timestamps
-    opened_at = db.Column(db.DateTime, default=datetime.utcnow)
+    opened_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     closed_at = db.Column(db.DateTime)
     
     # MT5 integration
@@ -331,15 +354,22 @@ class SignalProvider(db.Model):
 
 class SystemLog(db.Model):
     __tablename__ = "system_logs"
+    __table_args__ = (
+        db.Index("ix_system_logs_timestamp_level_category", "timestamp", "level", "category"),
+        db.Index("ix_system_logs_timestamp_id", "timestamp", "id"),
+        db.Index("ix_system_logs_level_timestamp", "level", "timestamp"),
+        db.Index("ix_system_logs_signal_id_timestamp", "signal_id", "timestamp"),
+        trigram_index("ix_system_logs_message_trgm", "message"),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     level = db.Column(db.String(20), nullable=False)  # DEBUG, INFO, WARNING, ERROR, CRITICAL
-    category = db.Column(db.String(50), nullable=False)  # parser, mt5, telegram, system
+    category = db.Column(db.String(50), nullable=False, index=True)  # parser, mt5, telegram, system
     message = db.Column(db.Text, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
     signal_id = db.Column(db.Integer, db.ForeignKey("signals.id"))
     additional_data = db.Column(db.Text)  # JSON string
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     
     user = db.relationship("User", backref="logs")
     signal = db.relationship("Signal", backref="logs")
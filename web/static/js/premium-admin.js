@@ -4,6 +4,7 @@ class PremiumAdminPanel {
         this.charts = {};
         this.currentTab = 'dashboard';
         this.metricsInterval = null;
+        this.metricsStream = null;
         this.initialize();
     }
 
@@ -287,7 +288,17 @@ class PremiumAdminPanel {
     }
 
     startMetricsPolling() {
-        // Update metrics every 30 seconds
+        // Prefer server-pushed metrics; fall back to polling every 30 seconds
+        if (window.EventSource) {
+            this.metricsStream = new EventSource('/admin/api/system-metrics/stream');
+            this.metricsStream.onmessage = (event) => {
+                if (this.currentTab === 'dashboard') {
+                    this.updateDashboardMetrics(JSON.parse(event.data));
+                }
+            };
+            return;
+        }
+
         this.metricsInterval = setInterval(() => {
             if (this.currentTab === 'dashboard') {
                 this.loadDashboardData();